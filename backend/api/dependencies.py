@@ -0,0 +1,9 @@
+"""Request-scoped helpers shared by the HTTP and WebSocket routes."""
+from starlette.requests import HTTPConnection
+
+def get_user_id(connection: HTTPConnection) -> str:
+    """Caller's user/tenant scope from ``X-User-Id`` or ``?user_id=``; empty means shared.
+
+    Browsers can't set headers on a WebSocket handshake, hence the query fallback.
+    """
+    return connection.headers.get("x-user-id") or connection.query_params.get("user_id", "")
@@ -1,3 +1,3 @@
-from . import chat, threads, upload
+from . import chat, documents, maintenance, metrics, threads, upload
 
-__all__ = ["chat", "threads", "upload"]
\ No newline at end of file
+__all__ = ["chat", "documents", "maintenance", "metrics", "threads", "upload"]
@@ -1,11 +1,21 @@
 """WebSocket chat endpoint."""
+import asyncio
+import functools
 import logging
 import json
 import uuid
+from contextlib import aclosing
+from typing import Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from backend.models.schemas import ChatMessageRequest, WebSocketMessageType
-from backend.services.chat_service import ChatService
+from backend.api.dependencies import get_user_id
+from backend.api.streaming import CoalesceConfig, EventSender
+from backend.config import settings
+from backend.core.metrics import ACTIVE_WEBSOCKETS, trace_turn
+from backend.core.runs import RunBuffer
+from backend.models.schemas import ChatMessageRequest, ResumeRequest, WebSocketMessageType
+from backend.services.chat_service import fallback_title
 from backend.services.thread_service import ThreadService
+from backend.utils.exceptions import RunRejectedError, RunResumeError
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -15,12 +25,150 @@ logger = logging.getLogger(__name__)
 async def websocket_chat(websocket: WebSocket):
     """WebSocket endpoint for chat interactions."""
     await websocket.accept()
+    ACTIVE_WEBSOCKETS.inc()
     logger.info("🔌 WebSocket client connected")
     
     # Access graph_manager through websocket.app.state
     graph_manager = websocket.app.state.graph_manager
-    chat_service = ChatService()
+    chat_service = websocket.app.state.chat_service
+    run_scheduler = websocket.app.state.run_scheduler
+    run_registry = websocket.app.state.run_registry
     thread_service = ThreadService()
+    user_id = get_user_id(websocket)
+    # Fair queuing is per user, or per address for anonymous clients
+    client_id = user_id or (websocket.client.host if websocket.client else "")
+    sender = EventSender(websocket, CoalesceConfig.from_connection(websocket))
+    # Turns run in the registry, detached from this connection; we only forward their events
+    run: Optional[RunBuffer] = None
+    forwarder: Optional[asyncio.Task] = None
+    # Forwarders of answered runs superseded by a new message, still relaying their title
+    draining: Set[asyncio.Task] = set()
+    
+    async def run_turn(run: RunBuffer, user_message: str, thread_id: str) -> Optional[asyncio.Future]:
+        # New threads are listed right away; the generated title follows as a thread_title event
+        is_first_message = await graph_manager.is_first_message(thread_id)
+        if is_first_message:
+            await thread_service.create_thread_summary(
+                thread_id, fallback_title(user_message), user_id=user_id
+            )
+        
+        # Send thread ID
+        run.publish({
+            "type": "thread_id",
+            "thread_id": thread_id
+        })
+        
+        # Stream response
+        token_count = 0
+        with trace_turn(thread_id, run.run_id):
+            # aclosing so a cancelled turn stops the graph run and saves the partial answer
+            async with aclosing(graph_manager.stream_response(user_message, thread_id)) as events:
+                async for event in events:
+                    event_type = event.get("type")
+                    
+                    if event_type == "token":
+                        token_count += 1
+                        run.publish(event)
+                    
+                    elif event_type == "status":
+                        run.publish(event)
+                    
+                    elif event_type == "tool_start":
+                        run.publish({
+                            "type": "status",
+                            "content": f"🔧 Calling tool: {event.get('name')}..."
+                        })
+                    
+                    elif event_type == "tool_end":
+                        run.publish({
+                            "type": "status",
+                            "content": f"✅ Tool {event.get('name')} completed"
+                        })
+                    
+                    elif event_type == "tool_error":
+                        run.publish({
+                            "type": "status",
+                            "content": f"⚠️ Tool {event.get('name')} failed"
+                        })
+        
+        logger.info(f"✅ Response complete | Tokens: {token_count} | Run: {run.run_id[:8]}")
+        
+        title: Optional[asyncio.Future] = None
+        if is_first_message:
+            title = asyncio.get_running_loop().create_future()
+            
+            async def publish_title(thread_id: str, text: str) -> None:
+                # Through the buffer, so a client that resumes the run gets the title too
+                run.publish({"type": "thread_title", "thread_id": thread_id, "title": text})
+                if not title.done():
+                    title.set_result(None)
+            
+            if not chat_service.request_title(thread_id, user_message, on_title=publish_title):
+                title = None
+        else:
+            await thread_service.touch_thread(thread_id)
+        
+        # Send completion
+        run.publish({"type": "complete"})
+        run.answered = True
+        return title
+    
+    async def handle_message(run: RunBuffer, user_message: str, thread_id: str) -> None:
+        async def publish_status(content: str) -> None:
+            run.publish({"type": "status", "content": content})
+        
+        # First event, so even a client dropped while queued knows what to resume
+        run.publish({"type": "run", "run_id": run.run_id})
+        try:
+            async with run_scheduler.run(thread_id, client_id, on_status=publish_status):
+                title = await run_turn(run, user_message, thread_id)
+        except RunRejectedError as e:
+            logger.warning(f"🚦 Run rejected for {thread_id[:8]}: {e.message}")
+            run.publish({
+                "type": "error",
+                "message": e.message
+            })
+            return
+        if title:
+            # Out of the scheduler slot; the run stays open so its followers get the title
+            try:
+                await asyncio.wait({title}, timeout=settings.run_title_wait_seconds)
+            except asyncio.CancelledError:
+                # The answer is already complete; being abandoned only ends the wait
+                return
+    
+    async def forward(run: RunBuffer, offset: int) -> None:
+        # Every frame carries the offset to resume from if the connection drops after it
+        try:
+            async for seq, event in run_registry.follow(run, offset):
+                if event["type"] == "token":
+                    await sender.send_token(event["content"], offset=seq + 1)
+                else:
+                    await sender.send({**event, "offset": seq + 1})
+        except RunResumeError as e:
+            await sender.send({
+                "type": "error",
+                "message": e.message
+            })
+    
+    async def stop_forwarding() -> None:
+        nonlocal forwarder
+        task, forwarder = forwarder, None
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    
+    def keep_draining() -> None:
+        nonlocal forwarder
+        task, forwarder = forwarder, None
+        if task and not task.done():
+            draining.add(task)
+            task.add_done_callback(draining.discard)
+    
+    def start_forwarding(target: RunBuffer, offset: int) -> None:
+        nonlocal run, forwarder
+        run = target
+        forwarder = asyncio.create_task(forward(target, offset))
     
     try:
         while True:
@@ -28,11 +176,33 @@ async def websocket_chat(websocket: WebSocket):
             data = await websocket.receive_text()
             message_data = json.loads(data)
             
+            if message_data.get("type") == WebSocketMessageType.CANCEL:
+                if run and not run.done and not run.answered:
+                    # The run publishes its own cancelled completion, which we forward
+                    await run_registry.cancel(run)
+                    logger.info(f"⏹️ Run {run.run_id[:8]} cancelled by client")
+                else:
+                    await sender.send({"type": "complete", "cancelled": True})
+                continue
+            
+            if "resume" in message_data:
+                try:
+                    resume = ResumeRequest(**message_data)
+                    await stop_forwarding()
+                    start_forwarding(run_registry.get(resume.resume, user_id), resume.offset)
+                    logger.info(f"🔁 Resuming run {resume.resume[:8]} at offset {resume.offset}")
+                except Exception as e:
+                    await sender.send({
+                        "type": "error",
+                        "message": e.message if isinstance(e, RunResumeError) else f"Invalid request: {str(e)}"
+                    })
+                continue
+            
             # Validate request
             try:
                 request_model = ChatMessageRequest(**message_data)
             except Exception as e:
-                await websocket.send_json({
+                await sender.send({
                     "type": "error",
                     "message": f"Invalid request: {str(e)}"
                 })
@@ -43,49 +213,18 @@ async def websocket_chat(websocket: WebSocket):
             
             logger.info(f"📨 Message: '{user_message[:50]}...' | Thread: {thread_id[:8]}")
             
-            # Send thread ID
-            await websocket.send_json({
-                "type": "thread_id",
-                "thread_id": thread_id
-            })
-            
-            # Check if first message
-            is_first_message = await graph_manager.is_first_message(thread_id)
-            
-            # Stream response
-            token_count = 0
-            async for event in graph_manager.stream_response(user_message, thread_id):
-                event_type = event.get("type")
-                
-                if event_type == "token":
-                    token_count += 1
-                    await websocket.send_json(event)
-                
-                elif event_type == "status":
-                    await websocket.send_json(event)
-                
-                elif event_type == "tool_start":
-                    await websocket.send_json({
-                        "type": "status",
-                        "content": f"🔧 Calling tool: {event.get('name')}..."
-                    })
-                
-                elif event_type == "tool_end":
-                    await websocket.send_json({
-                        "type": "status",
-                        "content": f"✅ Tool {event.get('name')} completed"
-                    })
-            
-            logger.info(f"✅ Response complete | Tokens: {token_count}")
-            
-            # Generate summary for first message
-            if is_first_message:
-                summary = await chat_service.generate_summary(user_message)
-                await thread_service.create_thread_summary(thread_id, summary)
-                logger.info(f"📝 Summary: '{summary}'")
-            
-            # Send completion
-            await websocket.send_json({"type": "complete"})
+            # A new message supersedes whatever this connection was still generating
+            if run and run.answered:
+                keep_draining()
+            elif run and not run.done:
+                await run_registry.cancel(run)
+            await stop_forwarding()
+            start_forwarding(
+                run_registry.start(
+                    thread_id, user_id, functools.partial(handle_message, user_message=user_message, thread_id=thread_id)
+                ),
+                0
+            )
     
     except WebSocketDisconnect:
         logger.info("🔌 Client disconnected")
@@ -93,9 +232,18 @@ async def websocket_chat(websocket: WebSocket):
     except Exception as e:
         logger.error(f"❌ WebSocket error: {e}", exc_info=True)
         try:
-            await websocket.send_json({
+            await sender.send({
                 "type": "error",
                 "message": str(e)
             })
         except:
-            pass
\ No newline at end of file
+            pass
+    
+    finally:
+        # The run keeps going for run_disconnect_grace_seconds in case the client resumes
+        await stop_forwarding()
+        for task in list(draining):
+            task.cancel()
+        await asyncio.gather(*draining, return_exceptions=True)
+        await sender.close()
+        ACTIVE_WEBSOCKETS.dec()
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Indexed document management endpoints."""
+import logging
+from fastapi import APIRouter, HTTPException, Request
+from backend.models.schemas import DeleteDocumentResponse, DocumentListResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("", response_model=DocumentListResponse)
+async def list_documents(request: Request):
+    """List every indexed document source."""
+    try:
+        documents = await request.app.state.document_registry.list_documents()
+        return DocumentListResponse(documents=documents)
+    except Exception as e:
+        logger.error(f"Error listing documents: {e}", exc_info=True)
+        return DocumentListResponse(documents=[], error=str(e))
+
+
+@router.delete("/{source}", response_model=DeleteDocumentResponse)
+async def delete_document(request: Request, source: str):
+    """Remove a document's chunks from the knowledge base."""
+    registry = request.app.state.document_registry
+    if await registry.get(source) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    chunk_ids = await registry.chunk_ids(source)
+    await request.app.state.vector_service.delete(chunk_ids)
+    file_path = await registry.remove(source)
+    if file_path:
+        await request.app.state.ingest_service.release_file(file_path)
+    logger.info(f"🗑️ Deleted {source} ({len(chunk_ids)} chunks)")
+    return DeleteDocumentResponse(status="success", chunks_deleted=len(chunk_ids))
@@ -0,0 +1,29 @@
+"""Database maintenance endpoints."""
+import logging
+from fastapi import APIRouter, Request
+from backend.models.schemas import MaintenanceStatsResponse
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+async def _stats(request: Request) -> MaintenanceStatsResponse:
+    maintenance_service = request.app.state.maintenance_service
+    return MaintenanceStatsResponse(
+        database=await maintenance_service.database_stats(),
+        compaction=maintenance_service.compaction_stats(),
+        db_pool=request.app.state.db_pool.stats()
+    )
+
+
+@router.get("/stats", response_model=MaintenanceStatsResponse)
+async def maintenance_stats(request: Request):
+    """Database size, checkpoint counts and totals reclaimed by compaction."""
+    return await _stats(request)
+
+
+@router.post("/compact", response_model=MaintenanceStatsResponse)
+async def compact(request: Request):
+    """Run a compaction pass now instead of waiting for the next interval."""
+    await request.app.state.maintenance_service.compact()
+    return await _stats(request)
@@ -0,0 +1,42 @@
+"""Prometheus metrics and recent turn traces."""
+import logging
+from typing import Optional
+from fastapi import APIRouter, Query, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE
+from prometheus_client.openmetrics.exposition import generate_latest as generate_openmetrics
+from backend.core.metrics import recent_traces, tier_summary
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("")
+async def metrics(request: Request):
+    """Prometheus exposition; OpenMetrics (with run/thread exemplars) when the scraper asks for it."""
+    if "application/openmetrics-text" in request.headers.get("accept", ""):
+        return Response(generate_openmetrics(REGISTRY), media_type=OPENMETRICS_CONTENT_TYPE)
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+
+@router.get("/traces")
+async def traces(
+    thread_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    tier: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=1000)
+):
+    """Per-stage breakdown of recent turns, newest first."""
+    matching = [
+        trace.to_dict() for trace in reversed(recent_traces)
+        if (thread_id is None or trace.thread_id == thread_id)
+        and (run_id is None or trace.run_id == run_id)
+        and (tier is None or trace.tier == tier)
+    ]
+    return {"traces": matching[:limit]}
+
+
+@router.get("/tiers")
+async def tiers():
+    """Latency and token use per routing tier over the recent turns."""
+    return {"tiers": tier_summary()}
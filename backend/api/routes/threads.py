@@ -1,61 +1,65 @@
 
 import logging
-from fastapi import APIRouter, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from backend.api.dependencies import get_user_id
+from backend.config import settings
 from backend.models.schemas import ThreadListResponse, ChatHistoryResponse, DeleteThreadResponse
 from backend.services.thread_service import ThreadService
+from backend.utils.exceptions import DatabaseError
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("", response_model=ThreadListResponse)
-async def get_threads():
-    """Get all conversation threads."""
+async def get_threads(
+    request: Request,
+    limit: int = Query(settings.threads_page_size, ge=1, le=settings.threads_page_max),
+    before: Optional[str] = None
+):
+    """Get a page of the caller's conversation threads, newest first."""
     try:
         thread_service = ThreadService()
-        threads = await thread_service.get_all_threads()
+        threads, next_cursor = await thread_service.get_threads(
+            user_id=get_user_id(request), limit=limit, before=before
+        )
         logger.info(f"Retrieved {len(threads)} threads")
-        return ThreadListResponse(threads=threads)
+        return ThreadListResponse(threads=threads, next_cursor=next_cursor)
+    except DatabaseError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
     except Exception as e:
         logger.error(f"Error fetching threads: {e}", exc_info=True)
         return ThreadListResponse(threads=[], error=str(e))
 
 
 @router.get("/history/{thread_id}", response_model=ChatHistoryResponse)
-async def get_thread_history(thread_id: str):
-    """Get chat history for a specific thread."""
+async def get_thread_history(
+    request: Request,
+    thread_id: str,
+    limit: int = Query(settings.history_page_size, ge=1, le=settings.history_page_max),
+    before: Optional[int] = Query(None, ge=0)
+):
+    """Get a page of chat history for a specific thread, oldest message first."""
     try:
-        from backend.main import app
-        graph_manager = app.state.graph_manager
-        
-        raw_messages = await graph_manager.get_thread_history(thread_id)
-        
-        # Filter logic:
-        # 1. Keep all USER messages.
-        # 2. Keep ASSISTANT messages that have actual text content.
-        # 3. Discard internal tool outputs (JSON strings) and empty tool-call markers.
-        filtered_messages = []
-        for msg in raw_messages:
-            # Skip messages with no content (often sent during tool triggering)
-            if not msg.content or msg.content.strip() == "":
-                continue
-            
-            # Skip raw JSON/Tool output (like the date tool output in your logs)
-            # We assume valid AI answers don't look like raw JSON objects
-            content_stripped = msg.content.strip()
-            if content_stripped.startswith('{') and content_stripped.endswith('}'):
-                continue
-                
-            # Optional: Skip "Found the following information" style RAG snippets 
-            # if you only want the final synthesized answer.
-            if content_stripped.startswith('Found the following information:'):
-                continue
-
-            filtered_messages.append(msg)
-
-        logger.info(f"Filtered {len(raw_messages)} down to {len(filtered_messages)} for thread {thread_id[:8]}")
-        return ChatHistoryResponse(messages=filtered_messages)
+        graph_manager = request.app.state.graph_manager
+        messages, next_cursor = await graph_manager.get_thread_history(
+            thread_id, limit=limit, before=before
+        )
+        logger.info(f"Returned {len(messages)} messages for thread {thread_id[:8]}")
+        return ChatHistoryResponse(messages=messages, next_cursor=next_cursor)
         
     except Exception as e:
         logger.error(f"Error getting history for {thread_id}: {e}", exc_info=True)
-        return ChatHistoryResponse(messages=[], error=str(e))
\ No newline at end of file
+        return ChatHistoryResponse(messages=[], error=str(e))
+
+
+@router.delete("/{thread_id}", response_model=DeleteThreadResponse)
+async def delete_thread(request: Request, thread_id: str):
+    """Delete a thread with all of its checkpoints."""
+    thread_service = ThreadService()
+    if not await thread_service.delete_thread(thread_id):
+        return DeleteThreadResponse(status="error", error="Failed to delete thread")
+    request.app.state.graph_manager.invalidate_history(thread_id)
+    logger.info(f"🗑️ Deleted thread {thread_id[:8]}")
+    return DeleteThreadResponse(status="success")
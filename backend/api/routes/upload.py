@@ -1,29 +1,81 @@
 """File upload endpoints."""
+import hashlib
 import logging
-import shutil
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+import uuid
+from pathlib import Path
+from typing import Tuple
+import anyio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, status
 from backend.config import settings
-from backend.models.schemas import FileUploadResponse
+from backend.models.schemas import FileUploadResponse, IngestJobResponse
 from backend.services.document_service import DocumentService
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/upload-pdf", response_model=FileUploadResponse)
-async def upload_pdf(file: UploadFile = File(...)):
-    document_service = DocumentService()
+async def _stream_to_disk(file: UploadFile, file_path: Path) -> Tuple[int, str]:
+    """Copy the upload in fixed-size chunks, aborting once it exceeds the size limit.
+
+    Returns the size and sha256 of the content.
+    """
+    written = 0
+    digest = hashlib.sha256()
+    async with await anyio.open_file(file_path, "wb") as buffer:
+        while chunk := await file.read(settings.upload_chunk_size):
+            written += len(chunk)
+            if written > settings.max_upload_size:
+                break
+            digest.update(chunk)
+            await buffer.write(chunk)
+    if written > settings.max_upload_size:
+        await anyio.Path(file_path).unlink(missing_ok=True)
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.max_upload_size} byte limit"
+        )
+    return written, digest.hexdigest()
+
+@router.post("/upload-pdf", response_model=FileUploadResponse, status_code=status.HTTP_202_ACCEPTED)
+async def upload_pdf(request: Request, file: UploadFile = File(...)):
+    document_service = DocumentService(request.app.state.vector_service)
+    ingest_service = request.app.state.ingest_service
     
     if not document_service.validate_file(file.filename):
         raise HTTPException(status_code=400, detail="Invalid file type")
     
+    # A name of its own, so concurrent uploads can't write into each other's staging file
+    staging_path = settings.upload_path / f".{uuid.uuid4().hex}.part"
+    size, file_hash = await _stream_to_disk(file, staging_path)
+    
+    indexed = await request.app.state.document_registry.get(file.filename)
+    if indexed and indexed.file_hash == file_hash:
+        await anyio.Path(staging_path).unlink(missing_ok=True)
+        logger.info(f"📄 {file.filename} unchanged, skipping ingest")
+        return FileUploadResponse(
+            status="unchanged", filename=file.filename, chunks_added=0,
+            message="Document is already indexed"
+        )
+    
+    # Stored by content hash and never rewritten: a queued or running job keeps reading what it was given
+    file_path = settings.upload_path / f"{file_hash}{Path(file.filename).suffix.lower()}"
+    if await anyio.Path(file_path).exists():
+        await anyio.Path(staging_path).unlink(missing_ok=True)
+    else:
+        await anyio.Path(staging_path).replace(file_path)
+    logger.info(f"📄 Stored {file.filename} ({size} bytes)")
+    
     try:
-        file_path = settings.upload_path / file.filename
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        chunks_added = await document_service.process_pdf(file_path)
+        job_id, created = await ingest_service.submit(file.filename, file_path, file_hash)
         return FileUploadResponse(
-            status="success", filename=file.filename, chunks_added=chunks_added
+            status="queued", filename=file.filename, job_id=job_id,
+            message=None if created else "Document is already being ingested"
         )
     except Exception as e:
-        return FileUploadResponse(status="error", message=str(e))
\ No newline at end of file
+        return FileUploadResponse(status="error", message=str(e))
+
+@router.get("/ingest/{job_id}", response_model=IngestJobResponse)
+async def get_ingest_job(request: Request, job_id: str):
+    job = await request.app.state.ingest_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingest job not found")
+    return job
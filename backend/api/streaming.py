@@ -0,0 +1,118 @@
+"""Outgoing event framing for the chat WebSocket."""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import orjson
+from starlette.requests import HTTPConnection
+from starlette.websockets import WebSocket
+from backend.config import settings
+
+@dataclass
+class CoalesceConfig:
+    max_delay: float  # seconds
+    max_bytes: int
+
+    @classmethod
+    def from_connection(cls, connection: HTTPConnection) -> Optional["CoalesceConfig"]:
+        """Per-connection opt-in via ``?coalesce=1`` or ``?coalesce_ms=..&coalesce_bytes=..``.
+
+        Clients that ask for nothing keep getting one frame per token.
+        """
+        params = connection.query_params
+        if not any(key in params for key in ("coalesce", "coalesce_ms", "coalesce_bytes")):
+            return None
+        try:
+            delay_ms = int(params.get("coalesce_ms", settings.ws_coalesce_ms))
+            max_bytes = int(params.get("coalesce_bytes", settings.ws_coalesce_bytes))
+        except ValueError:
+            return None
+        return cls(
+            max_delay=max(0, min(delay_ms, settings.ws_coalesce_max_ms)) / 1000,
+            max_bytes=max(1, min(max_bytes, settings.ws_coalesce_max_bytes))
+        )
+
+class EventSender:
+    """Serializes events with orjson and, if negotiated, batches tokens into fewer frames.
+
+    Buffered tokens go out as a single ``token`` event once ``max_bytes`` are
+    pending or ``max_delay`` has passed since the first of them, and always
+    before any other event so the stream order is unchanged. Sends are
+    serialized with a lock because the timer flushes from its own task.
+    A merged token frame carries the ``offset`` of its last token, so
+    resuming clients never see a token twice.
+    """
+
+    def __init__(self, websocket: WebSocket, coalesce: Optional[CoalesceConfig] = None):
+        self.websocket = websocket
+        self.coalesce = coalesce
+        self.frames = 0
+        self._lock = asyncio.Lock()
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._offset: Optional[int] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        async with self._lock:
+            await self._flush_locked()
+            await self._send(event)
+
+    async def send_token(self, content: str, offset: Optional[int] = None) -> None:
+        if self.coalesce is None:
+            event = {"type": "token", "content": content}
+            if offset is not None:
+                event["offset"] = offset
+            await self.send(event)
+            return
+        async with self._lock:
+            self._buffer.append(content)
+            self._offset = offset
+            self._buffered_bytes += len(content.encode("utf-8"))
+            if self._buffered_bytes >= self.coalesce.max_bytes or self.coalesce.max_delay == 0:
+                await self._flush_locked()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.coalesce.max_delay, self._on_timer
+                )
+
+    async def flush(self) -> None:
+        async with self._lock:
+            await self._flush_locked()
+
+    async def close(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._flush_task = asyncio.create_task(self._flush_quietly())
+
+    async def _flush_quietly(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            # The connection is gone; the chat loop notices on its next send or receive
+            pass
+
+    async def _flush_locked(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        event = {"type": "token", "content": "".join(self._buffer)}
+        if self._offset is not None:
+            event["offset"] = self._offset
+        self._buffer.clear()
+        self._buffered_bytes = 0
+        self._offset = None
+        await self._send(event)
+
+    async def _send(self, event: Dict[str, Any]) -> None:
+        await self.websocket.send_text(orjson.dumps(event).decode("utf-8"))
+        self.frames += 1
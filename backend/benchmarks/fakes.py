@@ -0,0 +1,190 @@
+"""Deterministic stand-ins for OpenAI models used by the benchmarks."""
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN_RE = re.compile(r"\w+")
+_BATCH_RE = re.compile(r"for each of these (\d+)")
+WORDS = (
+    "the service answered within budget while tokens streamed steadily across pooled "
+    "connections and the checkpoint landed safely in sqlite before the next turn began"
+).split()
+TOOL_KEYWORD = "[tool]"
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words feature hashing: cheap, offline, and similar text lands close together.
+
+    ``latency`` seconds are added per call to stand in for the API round trip.
+    """
+
+    def __init__(self, size: int = 256, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for token in _TOKEN_RE.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._embed(text)
+
+def _text(message: BaseMessage) -> str:
+    return message.content if isinstance(message.content, str) else json.dumps(message.content)
+
+class FakeChatModel(BaseChatModel):
+    """Streams a deterministic answer after ``ttft`` seconds at ``tokens_per_second``.
+
+    The answer depends only on the last message, so runs are repeatable. A
+    user message containing ``[tool]`` gets a calculator call first, which
+    exercises the tool node; title prompts get titles (a JSON array when
+    batched) so the background title worker behaves as in production.
+    Usage metadata counts words, so token metrics have something to show.
+    """
+
+    ttft: float = 0.3
+    tokens_per_second: float = 50.0
+    response_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        text = _text(last)
+        seed = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+        if isinstance(last, HumanMessage) and TOOL_KEYWORD in text:
+            return AIMessage(content="", tool_calls=[{
+                "name": "calculator",
+                "args": {"first_num": seed[0], "second_num": seed[1] + 1, "operation": "mul"},
+                "id": f"call_{seed.hex()}"
+            }])
+        batch = _BATCH_RE.search(text)
+        if batch:
+            return AIMessage(content=json.dumps([f"Benchmark thread {i + 1}" for i in range(int(batch.group(1)))]))
+        if text.startswith("Generate a short title"):
+            return AIMessage(content="Benchmark thread")
+        words = [WORDS[(seed[i % len(seed)] + i) % len(WORDS)] for i in range(self.response_tokens)]
+        return AIMessage(content=" ".join(words))
+
+    def _usage(self, messages: List[BaseMessage], reply: AIMessage) -> Dict[str, int]:
+        input_tokens = sum(len(_TOKEN_RE.findall(_text(message))) for message in messages)
+        output_tokens = len(_TOKEN_RE.findall(reply.content)) + 10 * len(reply.tool_calls)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _pieces(self, reply: AIMessage) -> List[str]:
+        words = reply.content.split(" ")
+        return [words[0]] + [" " + word for word in words[1:]]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        reply = self._reply(messages)
+        reply.usage_metadata = self._usage(messages, reply)
+        time.sleep(self.ttft + len(self._pieces(reply)) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        reply = self._reply(messages)
+        reply.usage_metadata = self._usage(messages, reply)
+        await asyncio.sleep(self.ttft + len(self._pieces(reply)) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        time.sleep(self.ttft)
+        if reply.tool_calls:
+            yield self._tool_call_chunk(messages, reply)
+            return
+        for piece in self._pieces(reply):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            time.sleep(1 / self.tokens_per_second)
+        yield self._usage_chunk(messages, reply)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        reply = self._reply(messages)
+        await asyncio.sleep(self.ttft)
+        if reply.tool_calls:
+            yield self._tool_call_chunk(messages, reply)
+            return
+        interval = 1 / self.tokens_per_second
+        for piece in self._pieces(reply):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(interval)
+        yield self._usage_chunk(messages, reply)
+
+    def _usage_chunk(self, messages: List[BaseMessage], reply: AIMessage) -> ChatGenerationChunk:
+        # Like OpenAI with stream_usage: a last, empty chunk carries the usage
+        return ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages, reply)))
+
+    def _tool_call_chunk(self, messages: List[BaseMessage], reply: AIMessage) -> ChatGenerationChunk:
+        return ChatGenerationChunk(message=AIMessageChunk(
+            content="",
+            usage_metadata=self._usage(messages, reply),
+            tool_call_chunks=[
+                {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                for i, call in enumerate(reply.tool_calls)
+            ]
+        ))
@@ -0,0 +1,113 @@
+"""Import-time profile of the app: what ``import backend.main`` costs and where it goes.
+
+Imports the app in fresh interpreters (nothing cached in ``sys.modules``),
+reports the median wall time over --repeat runs, and breaks one
+``python -X importtime`` run down per module and per top-level package.
+With --budget the command exits 1 when the median exceeds it, so it can gate
+CI the way ``load compare`` does.
+
+Usage:
+    python -m backend.benchmarks.imports
+    python -m backend.benchmarks.imports --top 30 --repeat 7 --budget 2.0 --output imports.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+_TIMER = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+def environment() -> Dict[str, str]:
+    return {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "offline-benchmark"),
+    }
+
+def wall_time(module: str) -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", _TIMER.format(module=module)],
+        cwd=REPO_ROOT, env=environment(), capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+def import_times(module: str) -> List[Dict[str, Any]]:
+    """One ``-X importtime`` run as rows of module, depth, self and cumulative seconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=environment(), capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            rows.append({
+                "module": name,
+                "depth": len(indent) // 2,
+                "self": int(own) / 1e6,
+                "cumulative": int(cumulative) / 1e6,
+            })
+    return rows
+
+def profile(module: str, repeat: int, top: int) -> Dict[str, Any]:
+    walls = [wall_time(module) for _ in range(repeat)]
+    rows = import_times(module)
+    packages: Dict[str, float] = defaultdict(float)
+    for row in rows:
+        packages[row["module"].split(".")[0]] += row["self"]
+    first_party = [row for row in rows if row["module"].split(".")[0] == module.split(".")[0]]
+    return {
+        "module": module,
+        "wall_seconds": {"median": statistics.median(walls), "min": min(walls), "max": max(walls), "runs": repeat},
+        "modules_imported": len(rows),
+        "packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+        "slowest_modules": sorted(rows, key=lambda row: -row["self"])[:top],
+        "first_party": sorted(first_party, key=lambda row: -row["cumulative"])[:top],
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    wall = report["wall_seconds"]
+    print(
+        f"import {report['module']}: {wall['median']:.3f}s median over {wall['runs']} runs "
+        f"(min {wall['min']:.3f}s, max {wall['max']:.3f}s), {report['modules_imported']} modules\n"
+    )
+    print("self time by top-level package")
+    for package, seconds in report["packages"].items():
+        print(f"  {seconds:8.3f}s  {package}")
+    print("\nslowest modules (self time)")
+    for row in report["slowest_modules"]:
+        print(f"  {row['self']:8.3f}s  {row['module']}")
+    print(f"\n{report['module'].split('.')[0]} modules (cumulative, including what they pull in)")
+    for row in report["first_party"]:
+        print(f"  {row['cumulative']:8.3f}s  {'  ' * row['depth']}{row['module']}")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="backend.main")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters timed for the median")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget", type=float, help="fail (exit 1) if the median import takes longer, in seconds")
+    parser.add_argument("--output", type=Path, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    report = profile(args.module, args.repeat, args.top)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    print_report(report)
+    if args.budget is not None:
+        median = report["wall_seconds"]["median"]
+        verdict = "within" if median <= args.budget else "OVER"
+        print(f"\n{verdict} budget: {median:.3f}s vs {args.budget:.3f}s")
+        sys.exit(0 if median <= args.budget else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+"""Offline load test of the whole server: chat WebSockets, PDF ingest and thread listing.
+
+Starts the stub MCP server and the app (uvicorn) in subprocesses with
+``llm_provider=fake`` and ``embedding_provider=fake`` in a scratch
+directory, so nothing leaves the machine, then runs three phases:
+
+    chat     --clients WebSockets connect, then each sends --turns messages
+             (every --tool-every'th one triggers a tool call)
+    ingest   --uploads generated PDFs posted to /upload-pdf and polled to completion
+    threads  --listings GET /threads requests, --listing-concurrency at a time
+
+and reports throughput, TTFT p50/p95/p99, event-loop lag (scraped from
+/metrics), server RSS per open connection, and startup time (process spawn
+to a healthy /health, and on to the vector store reporting ready there,
+since it opens in the background). Results are JSON; ``compare`` diffs two of them and
+exits 1 on regressions beyond --threshold; ``run --startup-budget`` exits 1
+when startup alone takes longer.
+
+Usage:
+    python -m backend.benchmarks.load run --clients 100 --turns 3 --output before.json
+    python -m backend.benchmarks.load run --fake-ttft-ms 50 --fake-tokens-per-second 200 --output after.json
+    python -m backend.benchmarks.load compare before.json after.json --threshold 0.1
+    python -m backend.benchmarks.load run --phases threads --listings 50 --startup-budget 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+import websockets
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Metrics where a larger value is better; everything else numeric counts as lower-is-better
+HIGHER_IS_BETTER = ("throughput", "per_second", "completed")
+# Sections and workload sizes that describe the run rather than measure it
+NOT_COMPARED = ("config", "meta", "samples", "clients", "uploads", "requests")
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    values = sorted(values)
+
+    def pick(q: float) -> float:
+        return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "max": values[-1]}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_bytes(pid: int) -> Optional[int]:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def make_pdf(pages: List[str]) -> bytes:
+    """A minimal text PDF, so ingest runs without extra dependencies."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{4 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        lines = " ".join(f"({text[j:j + 90]}) '" for j in range(0, len(text), 90))
+        ops = f"BT /F1 9 Tf 20 770 Td 11 TL {lines} ET"
+        objects.append(f"<< /Length {len(ops)} >>\nstream\n{ops}\nendstream")
+    out, offsets = "%PDF-1.4\n", []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+def document_pages(index: int, n_pages: int) -> List[str]:
+    words = "invoice router snapshot session parcel latency refund replica token courier quota gateway".split()
+    return [
+        f"Document {index} page {page}. " + " ".join(words[(index + page + k) % len(words)] for k in range(300))
+        for page in range(n_pages)
+    ]
+
+class ServerProcess:
+    """The app and the stub MCP server, running on fake models in a scratch directory."""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = Path(tempfile.mkdtemp(prefix="load-bench-"))
+        self.port = free_port()
+        self.mcp_port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.processes: List[subprocess.Popen] = []
+        self.log = None
+        self.startup_seconds: Optional[float] = None
+        self.vector_ready_seconds: Optional[float] = None
+
+    def environment(self) -> Dict[str, str]:
+        args = self.args
+        return {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])),
+            "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "offline-benchmark"),
+            "ANONYMIZED_TELEMETRY": "False",
+            "LLM_PROVIDER": "fake",
+            "EMBEDDING_PROVIDER": "fake",
+            "FAKE_LLM_TTFT_MS": str(args.fake_ttft_ms),
+            "FAKE_LLM_TOKENS_PER_SECOND": str(args.fake_tokens_per_second),
+            "FAKE_LLM_RESPONSE_TOKENS": str(args.fake_response_tokens),
+            "FAKE_EMBEDDING_LATENCY_MS": str(args.fake_embedding_latency_ms),
+            "MCP_EXPENSE_URL": f"http://127.0.0.1:{self.mcp_port}/sse",
+            "DB_PATH": str(self.workdir / "chatbot.db"),
+            "VECTOR_DB_PATH": str(self.workdir / "vector_db"),
+            "EMBEDDING_CACHE_PATH": str(self.workdir / "embedding_cache.db"),
+            "LEXICAL_INDEX_PATH": str(self.workdir / "lexical_index.db"),
+            "UPLOAD_DIR": str(self.workdir / "uploads"),
+            "COMPACTION_INTERVAL_SECONDS": "0",
+            "LOG_LEVEL": args.server_log_level,
+        }
+
+    async def start(self) -> None:
+        env = self.environment()
+        self.log = log = open(self.workdir / "server.log", "w")
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "backend.benchmarks.mcp_stub", "--port", str(self.mcp_port)],
+            env=env, cwd=self.workdir, stdout=log, stderr=subprocess.STDOUT
+        ))
+        await self._wait_for_port(self.mcp_port)
+        spawned = time.perf_counter()
+        self.processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            env=env, cwd=self.workdir, stdout=log, stderr=subprocess.STDOUT
+        ))
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            deadline = time.monotonic() + self.args.startup_timeout
+            while time.monotonic() < deadline:
+                if self.processes[-1].poll() is not None:
+                    raise RuntimeError(f"Server exited during startup; see {self.workdir / 'server.log'}")
+                try:
+                    response = await client.get("/health")
+                    if response.status_code == 200:
+                        self.startup_seconds = self.startup_seconds or time.perf_counter() - spawned
+                        vector_state = response.json().get("vector_store", {}).get("state")
+                        if vector_state == "failed":
+                            raise RuntimeError(f"Vector store failed to open; see {self.workdir / 'server.log'}")
+                        if vector_state in ("ready", None):
+                            self.vector_ready_seconds = time.perf_counter() - spawned
+                            return
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.05 if self.startup_seconds else 0.2)
+        raise RuntimeError(f"Server not ready after {self.args.startup_timeout}s; see {self.workdir / 'server.log'}")
+
+    async def _wait_for_port(self, port: int, timeout: float = 15.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"Nothing listening on port {port} after {timeout}s")
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.processes[-1].pid if self.processes else None
+
+    def stop(self) -> None:
+        for process in reversed(self.processes):
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self.log:
+            self.log.close()
+
+class LagScraper:
+    """Event-loop lag from the server's ``event_loop_lag_seconds`` histogram, as a diff between two scrapes."""
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.client = client
+
+    async def scrape(self) -> Dict[float, float]:
+        buckets: Dict[float, float] = {}
+        for line in (await self.client.get("/metrics")).text.splitlines():
+            if line.startswith("event_loop_lag_seconds_bucket"):
+                le = line.split('le="', 1)[1].split('"', 1)[0]
+                buckets[float("inf") if le == "+Inf" else float(le)] = float(line.rsplit(" ", 1)[1])
+        return buckets
+
+    @staticmethod
+    def summarize(before: Dict[float, float], after: Dict[float, float]) -> Dict[str, Optional[float]]:
+        """Quantiles as the upper bound of the bucket they fall in."""
+        counts = sorted((le, after[le] - before.get(le, 0.0)) for le in after)
+        total = counts[-1][1] if counts else 0
+        result: Dict[str, Optional[float]] = {"samples": total}
+        for name, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            result[name] = next((le for le, count in counts if total and count >= q * total), None)
+        return result
+
+class ChatLoad:
+    def __init__(self, args, server_url: str):
+        self.args = args
+        self.ws_url = server_url.replace("http", "ws", 1) + "/ws/chat" + ("?coalesce_ms=30" if args.coalesce else "")
+        self.ttft: List[float] = []
+        self.turns: List[float] = []
+        # Streamed characters, not frames: coalescing changes the frame count but not the text
+        self.chars = 0
+        self.errors: List[str] = []
+        self.arrived = 0
+        self.all_connected = asyncio.Event()
+        self.go = asyncio.Event()
+
+    def _arrive(self) -> None:
+        # Counts failed connects too, so one refused client doesn't stall the start
+        self.arrived += 1
+        if self.arrived == self.args.clients:
+            self.all_connected.set()
+
+    async def client(self, index: int) -> None:
+        try:
+            ws = await websockets.connect(self.ws_url, max_size=None, open_timeout=60)
+        except Exception as e:
+            self.errors.append(f"connect: {type(e).__name__}: {e}")
+            self._arrive()
+            return
+        self._arrive()
+        try:
+            async with ws:
+                await self.go.wait()
+                thread_id = None
+                for turn in range(self.args.turns):
+                    use_tool = self.args.tool_every and (index * self.args.turns + turn) % self.args.tool_every == 0
+                    message = f"client {index} turn {turn}" + (" [tool]" if use_tool else "")
+                    sent = time.perf_counter()
+                    await ws.send(json.dumps({"message": message, "thread_id": thread_id}))
+                    first_token = None
+                    deadline = sent + self.args.turn_timeout
+                    while True:
+                        try:
+                            frame = await asyncio.wait_for(ws.recv(), max(0.0, deadline - time.perf_counter()))
+                        except asyncio.TimeoutError:
+                            # The rest of this turn would arrive as the next turn's events, so stop this client
+                            self.errors.append(f"timeout: turn {turn} got no complete in {self.args.turn_timeout}s")
+                            return
+                        event = json.loads(frame)
+                        if event["type"] == "thread_id":
+                            thread_id = event["thread_id"]
+                        elif event["type"] == "token":
+                            self.chars += len(event["content"])
+                            if first_token is None:
+                                first_token = time.perf_counter()
+                                self.ttft.append(first_token - sent)
+                        elif event["type"] == "complete":
+                            self.turns.append(time.perf_counter() - sent)
+                            break
+                        elif event["type"] == "error":
+                            self.errors.append(event.get("message", "error"))
+                            break
+        except Exception as e:
+            self.errors.append(f"{type(e).__name__}: {e}")
+
+class Benchmark:
+    def __init__(self, args):
+        self.args = args
+        self.server: Optional[ServerProcess] = None
+        self.base_url = args.url
+        self.rss_samples: List[int] = []
+
+    async def run(self) -> Dict[str, Any]:
+        if not self.base_url:
+            self.server = ServerProcess(self.args)
+            await self.server.start()
+            self.base_url = self.server.base_url
+        try:
+            async with httpx.AsyncClient(base_url=self.base_url, timeout=120) as client:
+                lag = LagScraper(client)
+                report: Dict[str, Any] = {"meta": self.meta(), "config": vars(self.args)}
+                if self.server:
+                    report["startup"] = {
+                        "seconds": self.server.startup_seconds,
+                        "vector_ready_seconds": self.server.vector_ready_seconds,
+                    }
+                for phase in self.args.phases:
+                    before = await lag.scrape()
+                    report[phase] = await getattr(self, f"phase_{phase}")(client)
+                    report[phase]["event_loop_lag_seconds"] = lag.summarize(before, await lag.scrape())
+                return report
+        finally:
+            if self.server:
+                self.server.stop()
+
+    def meta(self) -> Dict[str, Any]:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "server": "managed" if self.server else self.base_url,
+        }
+
+    def rss(self) -> Optional[int]:
+        return rss_bytes(self.server.pid) if self.server else None
+
+    async def sample_rss(self) -> None:
+        while True:
+            value = self.rss()
+            if value:
+                self.rss_samples.append(value)
+            await asyncio.sleep(0.2)
+
+    async def phase_chat(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        load = ChatLoad(self.args, self.base_url)
+        baseline = self.rss()
+        sampler = asyncio.create_task(self.sample_rss())
+        tasks = [asyncio.create_task(load.client(i)) for i in range(self.args.clients)]
+        await asyncio.wait_for(load.all_connected.wait(), timeout=120)
+        await asyncio.sleep(0.5)
+        connected_rss = self.rss()
+        started = time.perf_counter()
+        load.go.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+        await asyncio.gather(sampler, return_exceptions=True)
+
+        per_connection = (
+            (connected_rss - baseline) / self.args.clients if baseline and connected_rss else None
+        )
+        return {
+            "clients": self.args.clients,
+            "turns_completed": len(load.turns),
+            "errors": len(load.errors),
+            "error_samples": load.errors[:5],
+            "duration_seconds": elapsed,
+            "throughput_turns_per_second": len(load.turns) / elapsed if elapsed else 0.0,
+            "streamed_chars_per_second": load.chars / elapsed if elapsed else 0.0,
+            "ttft_seconds": percentiles(load.ttft),
+            "turn_seconds": percentiles(load.turns),
+            "rss_baseline_mb": baseline / 2 ** 20 if baseline else None,
+            "rss_peak_mb": max(self.rss_samples) / 2 ** 20 if self.rss_samples else None,
+            "rss_per_idle_connection_kb": per_connection / 1024 if per_connection is not None else None,
+        }
+
+    async def phase_ingest(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(self.args.ingest_concurrency)
+        latencies: List[float] = []
+        errors: List[str] = []
+        pages = 0
+
+        async def ingest(index: int) -> None:
+            nonlocal pages
+            pdf = make_pdf(document_pages(index, self.args.pages_per_upload))
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    "/upload-pdf", files={"file": (f"bench-{index}.pdf", pdf, "application/pdf")}
+                )
+                body = response.json()
+                job_id = body.get("job_id")
+                if response.status_code >= 400 or not job_id:
+                    errors.append(str(body))
+                    return
+                while True:
+                    job = (await client.get(f"/ingest/{job_id}")).json()
+                    if job["status"] in ("completed", "failed"):
+                        break
+                    await asyncio.sleep(0.1)
+                if job["status"] == "failed":
+                    errors.append(job.get("error") or "failed")
+                    return
+                latencies.append(time.perf_counter() - started)
+                pages += job.get("total_pages") or 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(ingest(i) for i in range(self.args.uploads)))
+        elapsed = time.perf_counter() - started
+        return {
+            "uploads": self.args.uploads,
+            "completed": len(latencies),
+            "errors": len(errors),
+            "error_samples": errors[:5],
+            "duration_seconds": elapsed,
+            "throughput_documents_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "pages_per_second": pages / elapsed if elapsed else 0.0,
+            "job_seconds": percentiles(latencies),
+        }
+
+    async def phase_threads(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(self.args.listing_concurrency)
+        latencies: List[float] = []
+        errors = 0
+
+        async def listing() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get("/threads", params={"limit": 50})
+                if response.status_code != 200:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(listing() for _ in range(self.args.listings)))
+        elapsed = time.perf_counter() - started
+        return {
+            "requests": self.args.listings,
+            "errors": errors,
+            "duration_seconds": elapsed,
+            "throughput_requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "latency_seconds": percentiles(latencies),
+        }
+
+def flatten(report: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    for key, value in report.items():
+        if key in NOT_COMPARED:
+            continue
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> Tuple[List[List[str]], int]:
+    """Rows of (metric, base, new, change, verdict) and the number of regressions."""
+    before, after = flatten(base), flatten(new)
+    rows, regressions = [], 0
+    for metric in sorted(before.keys() & after.keys()):
+        old, current = before[metric], after[metric]
+        if old == current:
+            change = 0.0
+        elif old == 0:
+            change = float("inf") if current > 0 else float("-inf")
+        else:
+            change = (current - old) / abs(old)
+        better = change > 0 if any(word in metric for word in HIGHER_IS_BETTER) else change < 0
+        verdict = ""
+        if abs(change) > threshold:
+            verdict = "better" if better else "REGRESSION"
+            regressions += 0 if better else 1
+        rows.append([metric, f"{old:.4g}", f"{current:.4g}", f"{change:+.1%}", verdict])
+    return rows, regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the load test")
+    run.add_argument("--url", help="benchmark a server that is already running (no RSS figures)")
+    run.add_argument("--phases", nargs="+", choices=["chat", "ingest", "threads"], default=["chat", "ingest", "threads"])
+    run.add_argument("--clients", type=int, default=50)
+    run.add_argument("--turns", type=int, default=3)
+    run.add_argument("--tool-every", type=int, default=5, help="every Nth message triggers a tool call; 0 for none")
+    run.add_argument("--coalesce", action="store_true", help="negotiate token coalescing like the web client")
+    run.add_argument("--turn-timeout", type=float, default=120.0, help="seconds a turn may take before it counts as an error")
+    run.add_argument("--uploads", type=int, default=20)
+    run.add_argument("--pages-per-upload", type=int, default=5)
+    run.add_argument("--ingest-concurrency", type=int, default=4)
+    run.add_argument("--listings", type=int, default=500)
+    run.add_argument("--listing-concurrency", type=int, default=20)
+    run.add_argument("--fake-ttft-ms", type=int, default=300)
+    run.add_argument("--fake-tokens-per-second", type=float, default=50.0)
+    run.add_argument("--fake-response-tokens", type=int, default=60)
+    run.add_argument("--fake-embedding-latency-ms", type=int, default=20)
+    run.add_argument("--server-log-level", default="WARNING")
+    run.add_argument("--startup-timeout", type=float, default=60.0)
+    run.add_argument("--startup-budget", type=float, help="exit 1 if the server takes longer to become healthy, in seconds")
+    run.add_argument("--output", type=Path)
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("base", type=Path)
+    diff.add_argument("new", type=Path)
+    diff.add_argument("--threshold", type=float, default=0.10, help="relative change that counts (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        base, new = json.loads(args.base.read_text()), json.loads(args.new.read_text())
+        rows, regressions = compare(base, new, args.threshold)
+        header = ["metric", base["meta"].get("commit") or "base", new["meta"].get("commit") or "new", "change", ""]
+        widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+        for row in [header] + rows:
+            print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+        print(f"\n{regressions} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    report = asyncio.run(Benchmark(args).run())
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+    startup = report.get("startup", {}).get("seconds")
+    if args.startup_budget is not None and startup is not None:
+        within = startup <= args.startup_budget
+        print(f"\n{'within' if within else 'OVER'} startup budget: {startup:.2f}s vs {args.startup_budget:.2f}s")
+        sys.exit(0 if within else 1)
+
+if __name__ == "__main__":
+    main()
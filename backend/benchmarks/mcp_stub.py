@@ -0,0 +1,45 @@
+"""Offline stand-in for the expense MCP server, so the graph loads remote tools in benchmarks.
+
+Usage:
+    python -m backend.benchmarks.mcp_stub --port 8765
+    MCP_EXPENSE_URL=http://127.0.0.1:8765/sse uvicorn backend.main:app
+"""
+import argparse
+from typing import Dict, List, Optional
+from mcp.server.fastmcp import FastMCP
+
+def build_server(host: str = "127.0.0.1", port: int = 8765) -> FastMCP:
+    server = FastMCP("expense", host=host, port=port, log_level="WARNING")
+    expenses: List[Dict] = []
+
+    @server.tool()
+    def add_expense(date: str, amount: float, category: str, note: str = "") -> Dict:
+        """Record an expense."""
+        expenses.append({"id": len(expenses) + 1, "date": date, "amount": amount, "category": category, "note": note})
+        return {"status": "ok", "id": len(expenses)}
+
+    @server.tool()
+    def list_expenses(start_date: str, end_date: str) -> List[Dict]:
+        """List expenses between two ISO dates, inclusive."""
+        return [e for e in expenses if start_date <= e["date"] <= end_date]
+
+    @server.tool()
+    def summarize(start_date: str, end_date: str, category: Optional[str] = None) -> Dict[str, float]:
+        """Total spend per category between two ISO dates."""
+        totals: Dict[str, float] = {}
+        for e in expenses:
+            if start_date <= e["date"] <= end_date and category in (None, e["category"]):
+                totals[e["category"]] = totals.get(e["category"], 0.0) + e["amount"]
+        return totals
+
+    return server
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    build_server(args.host, args.port).run(transport="sse")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Recall@k and latency of pure-vector vs hybrid retrieval.
+
+Usage:
+    python -m backend.benchmarks.retrieval --docs 1000 --queries 200 --k 3
+    python -m backend.benchmarks.retrieval --embeddings openai --output results.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+from langchain_core.documents import Document
+from backend.config import settings
+
+TOPICS = {
+    "billing": "invoice refund payment charge subscription plan credit card statement",
+    "network": "router latency packet firewall gateway timeout dns connection",
+    "storage": "disk volume snapshot backup replica quota bucket retention",
+    "auth": "login password token session certificate sso permission role",
+    "shipping": "parcel courier warehouse delivery tracking pallet customs carrier",
+}
+FILLER = "the customer reported that after the update the service behaved unexpectedly and support escalated it".split()
+
+def build_corpus(n_docs: int, n_queries: int, seed: int) -> Tuple[List[Document], List[Tuple[str, str, str]]]:
+    rng = random.Random(seed)
+    docs, queries = [], []
+    for i in range(n_docs):
+        topic = rng.choice(list(TOPICS))
+        words = TOPICS[topic].split()
+        identifier = rng.choice([f"TICKET-{i:05d}", f"SKU-{rng.randint(10000, 99999)}-{i}", f"ERR_{topic.upper()}_{i:04d}"])
+        body = " ".join(rng.choice(words + FILLER) for _ in range(60))
+        docs.append(Document(
+            id=f"bench-{i}",
+            page_content=f"Case {identifier}: {body}",
+            metadata={"topic": topic, "identifier": identifier}
+        ))
+    for _ in range(n_queries):
+        doc = rng.choice(docs)
+        if rng.random() < 0.5:
+            queries.append(("identifier", f"What happened with {doc.metadata['identifier']}?", doc.id))
+        else:
+            sample = rng.sample(doc.page_content.split()[2:], 8)
+            queries.append(("semantic", " ".join(sample), doc.id))
+    return docs, queries
+
+def summarize(hits: List[bool], latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    return {
+        "recall_at_k": sum(hits) / len(hits),
+        "latency_p50_ms": statistics.median(latencies) * 1000,
+        "latency_p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+async def run(args) -> Dict:
+    from backend.services.vector_service import VectorService
+
+    workdir = Path(tempfile.mkdtemp(prefix="retrieval-bench-"))
+    settings.vector_db_path = str(workdir / "vector_db")
+    settings.lexical_index_path = str(workdir / "lexical_index.db")
+    settings.embedding_cache_path = str(workdir / "embedding_cache.db")
+    settings.vector_collection_name = "retrieval_bench"
+    settings.hybrid_search_enabled = True
+
+    embeddings = None
+    if args.embeddings == "fake":
+        from backend.benchmarks.fakes import HashingEmbeddings
+        embeddings = HashingEmbeddings()
+    service = VectorService(embeddings=embeddings)
+    await service.initialize()
+    try:
+        docs, queries = build_corpus(args.docs, args.queries, args.seed)
+        started = time.perf_counter()
+        await service.add_documents(docs)
+        ingest_seconds = time.perf_counter() - started
+
+        paths = {"vector": lambda q: service.dense_search(q, args.k), "hybrid": lambda q: service.search(q, args.k)}
+        report = {"config": vars(args), "ingest_seconds": ingest_seconds, "results": {}}
+        for name, search in paths.items():
+            by_kind: Dict[str, Tuple[List[bool], List[float]]] = {}
+            for kind, query, target in queries:
+                started = time.perf_counter()
+                results = await search(query)
+                elapsed = time.perf_counter() - started
+                hits, latencies = by_kind.setdefault(kind, ([], []))
+                hits.append(any(doc.id == target for doc in results))
+                latencies.append(elapsed)
+            all_hits = [h for hits, _ in by_kind.values() for h in hits]
+            all_latencies = [l for _, latencies in by_kind.values() for l in latencies]
+            report["results"][name] = {
+                "overall": summarize(all_hits, all_latencies),
+                **{kind: summarize(*values) for kind, values in by_kind.items()},
+            }
+        return report
+    finally:
+        await service.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=settings.vector_search_k)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embeddings", choices=["fake", "openai"], default="fake")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
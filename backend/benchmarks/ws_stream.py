@@ -0,0 +1,108 @@
+"""Frames/sec and CPU per streamed token on the chat WebSocket send path.
+
+Streams fake tokens through a real Starlette WebSocket whose ASGI send just
+counts bytes, so the numbers cover serialization and framing on the server
+and nothing else.
+
+CPU spent by the same streams without sending anything is measured first
+and subtracted, giving ``send_cpu_us_per_token``.
+
+Modes:
+    stdlib     send_json per token (the original protocol)
+    orjson     EventSender, one frame per token
+    coalesced  EventSender with --coalesce-ms / --coalesce-bytes
+
+Usage:
+    python -m backend.benchmarks.ws_stream --streams 200 --tokens 300
+    python -m backend.benchmarks.ws_stream --coalesce-ms 30 --output results.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List
+from starlette.websockets import WebSocket
+from backend.api.streaming import CoalesceConfig, EventSender
+
+WORDS = "the quick brown fox jumps over a lazy dog while streaming tokens över naïve wires".split()
+
+class CountingSink:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def receive(self) -> Dict:
+        return {"type": "websocket.connect"}
+
+    async def send(self, message: Dict) -> None:
+        if message["type"] == "websocket.send":
+            self.frames += 1
+            self.bytes += len(message.get("text") or message.get("bytes") or "")
+
+async def stream(mode: str, sink: CountingSink, tokens: List[str], args) -> None:
+    websocket = WebSocket({"type": "websocket", "path": "/ws/chat", "headers": []}, sink.receive, sink.send)
+    await websocket.accept()
+    coalesce = CoalesceConfig(args.coalesce_ms / 1000, args.coalesce_bytes) if mode == "coalesced" else None
+    sender = EventSender(websocket, coalesce)
+    await sender.send({"type": "thread_id", "thread_id": "bench"})
+    for token in tokens:
+        if mode == "idle":
+            pass
+        elif mode == "stdlib":
+            await websocket.send_json({"type": "token", "content": token})
+        else:
+            await sender.send_token(token)
+        # Models emit tokens in bursts with short gaps in between
+        await asyncio.sleep(args.token_interval_ms / 1000)
+    await sender.send({"type": "complete"})
+    await sender.close()
+
+async def run_mode(mode: str, args, idle_cpu: float = 0.0) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    streams = [
+        [rng.choice(WORDS) + rng.choice(" ,.") for _ in range(args.tokens)]
+        for _ in range(args.streams)
+    ]
+    sink = CountingSink()
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    await asyncio.gather(*(stream(mode, sink, tokens, args) for tokens in streams))
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    total_tokens = args.streams * args.tokens
+    return {
+        "frames": sink.frames,
+        "bytes": sink.bytes,
+        "frames_per_sec": sink.frames / wall,
+        "tokens_per_frame": total_tokens / sink.frames,
+        "cpu_seconds": cpu,
+        "cpu_us_per_token": cpu / total_tokens * 1e6,
+        "send_cpu_us_per_token": max(0.0, cpu - idle_cpu) / total_tokens * 1e6,
+        "wall_seconds": wall,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument("--token-interval-ms", type=float, default=2.0)
+    parser.add_argument("--coalesce-ms", type=int, default=30)
+    parser.add_argument("--coalesce-bytes", type=int, default=2048)
+    parser.add_argument("--modes", nargs="+", default=["stdlib", "orjson", "coalesced"])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    idle = asyncio.run(run_mode("idle", args))
+    report = {"config": vars(args), "idle_cpu_seconds": idle["cpu_seconds"], "results": {}}
+    for mode in args.modes:
+        report["results"][mode] = asyncio.run(run_mode(mode, args, idle["cpu_seconds"]))
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -11,15 +11,70 @@ class Settings(BaseSettings):
     alpha_vantage_api_key: Optional[str] = None
     
     # LLM Configuration
+    llm_provider: Literal["openai", "fake"] = "openai"  # "fake" is for offline benchmarks
     llm_model: str = "gpt-4o-mini"
     llm_streaming: bool = True
     llm_temperature: float = 0.7
     
+    # Model routing (a local heuristic picks a tier per turn; each tier binds its own tools)
+    routing_enabled: bool = True
+    routing_default_tier: str = "standard"  # runs llm_model unless model_tiers says otherwise
+    model_tiers: dict[str, str] = {}  # tier -> model; opt in with e.g. {"light": "gpt-4.1-nano"}
+    model_tier_tools: dict[str, list[str]] = {
+        "light": ["calculator", "percentage_calc", "get_system_time", "get_stock_price"]
+    }  # tiers not listed get every tool
+    routing_light_max_chars: int = 200  # longer messages always take the default tier
+    
+    # Run scheduling
+    max_concurrent_runs: int = 32
+    run_queue_size: int = 256
+    run_queue_timeout: float = 60.0
+    run_same_thread_policy: Literal["queue", "reject"] = "queue"
+    run_status_interval: float = 1.0
+    run_disconnect_grace_seconds: float = 30.0  # how long a run waits for its client to resume
+    run_buffer_max_events: int = 8192  # per run
+    run_buffer_ttl_seconds: int = 300  # after the run finishes
+    run_buffers_max_bytes: int = 64 * 1024 * 1024  # all runs together
+    run_title_wait_seconds: float = 15.0  # a first turn's run stays open this long for its generated title
+    
+    # Thread titles (generated in the background)
+    title_model: str = "gpt-4o-mini"
+    title_max_words: int = 6
+    title_queue_size: int = 1000
+    title_batch_size: int = 8
+    title_workers: int = 1
+    
+    # Context management
+    context_token_budget: int = 8000
+    context_summary_model: str = "gpt-4o-mini"
+    context_summary_max_tokens: int = 512
+    context_tool_output_max_tokens: int = 2000
+    
     # Embeddings
+    embedding_provider: Literal["openai", "fake"] = "openai"
     embedding_model: str = "text-embedding-3-small"
+    embedding_timeout: float = 30.0
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = "./embedding_cache.db"  # independent of vector_db_path; move both together
+    embedding_cache_memory_items: int = 5000
+    embedding_cache_max_bytes: int = 512 * 1024 * 1024  # 512MB
+    embedding_batch_size: int = 64
+    embedding_max_in_flight: int = 4
+    embedding_tokens_per_minute: int = 1_000_000  # 0 disables rate limiting
+    embedding_max_retries: int = 5
+    embedding_backoff_base: float = 1.0
+    embedding_backoff_max: float = 60.0
     
     # Database
     db_path: str = "chatbot.db"
+    db_pool_size: int = 4
+    db_busy_timeout_ms: int = 5000
+    db_statement_cache_size: int = 256
+    checkpoint_keep_last: int = 20  # per thread
+    thread_ttl_days: int = 0  # delete threads idle this long; 0 (default) keeps them forever
+    compaction_interval_seconds: int = 3600  # 0 disables background compaction
+    compaction_batch_size: int = 1000
+    compaction_vacuum_pages: int = 0  # 0 frees every free page
     vector_db_path: str = "./vector_db"
     
     # File Upload
@@ -30,13 +85,64 @@ class Settings(BaseSettings):
     # Vector Store
     vector_collection_name: str = "chat_knowledge"
     vector_search_k: int = 3
+    hybrid_search_enabled: bool = True
+    hybrid_candidate_k: int = 20
+    hybrid_rrf_k: int = 60
+    hybrid_lexical_min_score: float = 0.5  # relative to the best BM25 hit
+    lexical_index_path: str = "./lexical_index.db"
     
     # Text Splitting
     chunk_size: int = 1000
     chunk_overlap: int = 100
     
+    # Ingestion
+    ingest_workers: int = 1
+    ingest_process_workers: int = 2
+    ingest_pages_per_task: int = 8
+    upload_chunk_size: int = 1024 * 1024  # 1MB
+    
+    # Thread listing
+    threads_page_size: int = 50
+    threads_page_max: int = 200
+    history_page_size: int = 50
+    history_page_max: int = 500
+    history_cache_threads: int = 256
+    
+    # Tool execution (per-tool overrides are keyed by tool name)
+    tool_timeout_seconds: float = 30.0
+    tool_timeouts: dict[str, float] = {"duckduckgo_search": 15.0, "get_stock_price": 10.0}
+    tool_max_concurrency: int = 32  # per tool, shared by all conversations
+    tool_concurrency: dict[str, int] = {"duckduckgo_search": 8, "get_stock_price": 4}
+    tool_thread_pool_size: int = 16
+    tool_cache_ttls: dict[str, float] = {}  # overrides a tool's metadata["cache_ttl"]; 0 disables
+    tool_cache_max_entries: int = 1024  # per tool
+    
+    # Outbound HTTP (shared by tools, OpenAI clients and MCP)
+    http_http2: bool = True
+    http_max_connections_per_host: int = 100
+    http_host_limits: dict[str, int] = {}  # e.g. {"https://www.alphavantage.co": 5}
+    http_keepalive_expiry: float = 60.0
+    http_timeout: float = 30.0
+    http_connect_timeout: float = 10.0
+    http_pool_timeout: float = 30.0
+    http_connect_retries: int = 2
+    http_max_retries: int = 3  # 429/502/503/504 on idempotent requests
+    http_backoff_base: float = 0.5
+    http_backoff_max: float = 10.0
+    
     # MCP Configuration
     mcp_expense_url: str = "https://splendid-gold-dingo.fastmcp.app/mcp"
+    mcp_tool_cache_path: str = "./mcp_tools.json"  # last discovered tool schemas, used at startup
+    mcp_refresh_interval_seconds: int = 300  # 0 discovers once and keeps that tool set
+    mcp_timeout_seconds: float = 10.0  # per discovery or tool call
+    mcp_breaker_failures: int = 3  # consecutive failures before calls fail fast
+    mcp_breaker_reset_seconds: float = 30.0  # how long to fail fast before probing again
+    
+    # WebSocket streaming (token coalescing is opt-in per connection)
+    ws_coalesce_ms: int = 25
+    ws_coalesce_bytes: int = 2048
+    ws_coalesce_max_ms: int = 250
+    ws_coalesce_max_bytes: int = 64 * 1024
     
     # CORS
     cors_origins: list[str] = ["*"]
@@ -44,6 +150,16 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
     
+    # Metrics
+    metrics_trace_history: int = 200  # recent turn traces kept for /metrics/traces
+    metrics_loop_lag_interval: float = 0.25  # seconds between event-loop lag probes; 0 disables
+    
+    # Fake models (llm_provider / embedding_provider = "fake")
+    fake_llm_ttft_ms: int = 300
+    fake_llm_tokens_per_second: float = 50.0
+    fake_llm_response_tokens: int = 60
+    fake_embedding_latency_ms: int = 20  # per batch
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,211 @@
+"""Token-budgeted prompt assembly for the chat node."""
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence, Tuple
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+from backend.config import settings
+from backend.core.metrics import SUMMARY_DURATION, timed
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the conversation so far:\n"
+# Role markers and separators the chat format adds to every message
+MESSAGE_OVERHEAD = 4
+# Fold down to this share of the budget so the summarizer doesn't run again next turn
+FOLD_TARGET = 0.5
+OMITTED_TOOL_OUTPUT = "[earlier tool output omitted to fit the context budget]"
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(settings.llm_model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken unavailable ({e}); estimating 4 characters per token")
+        return None
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+def text_content(msg: BaseMessage) -> str:
+    if isinstance(msg.content, str):
+        return msg.content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part) for part in msg.content
+    )
+
+def message_tokens(msg: BaseMessage) -> int:
+    tokens = MESSAGE_OVERHEAD + count_tokens(text_content(msg))
+    if isinstance(msg, AIMessage) and msg.tool_calls:
+        tokens += count_tokens(json.dumps(msg.tool_calls, default=str))
+    return tokens
+
+def current_turn_start(messages: Sequence[BaseMessage]) -> int:
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return index
+    return 0
+
+def strip_tool_traffic(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """User messages and assistant text only; tool calls and their results are dropped."""
+    kept = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            kept.append(msg)
+        elif isinstance(msg, AIMessage):
+            text = text_content(msg)
+            if text.strip():
+                kept.append(AIMessage(content=text, id=msg.id))
+    return kept
+
+def trim_tool_output(msg: BaseMessage) -> BaseMessage:
+    limit = settings.context_tool_output_max_tokens
+    if not isinstance(msg, ToolMessage) or count_tokens(text_content(msg)) <= limit:
+        return msg
+    text = truncate_text(text_content(msg), limit)
+    return msg.model_copy(update={"content": f"{text}\n[... tool output truncated]"})
+
+class ContextManager:
+    """Keeps the prompt for every model call inside ``context_token_budget``.
+
+    The checkpointed ``messages`` are never rewritten, so the full history
+    stays available to the UI. Instead ``summary_cursor`` marks how many of
+    them have been folded into ``summary``. A prompt is the summary, the
+    unfolded earlier turns without their tool traffic, and the current turn
+    with oversized tool outputs cut down. When that exceeds the budget the
+    oldest whole turns are folded into the summary, extending it rather than
+    re-summarizing the thread.
+
+    Folding runs once per turn, but every tool round of the turn adds
+    results, so ``build_prompt`` also bounds each model call itself: earlier
+    rounds' tool results are stubbed first, then unfolded earlier turns are
+    left out of the prompt, and last the latest results share what is left.
+    """
+
+    def __init__(self, llm: BaseChatModel):
+        self.llm = llm
+        self.budget = settings.context_token_budget
+
+    def build_prompt(self, state: Dict[str, Any]) -> List[BaseMessage]:
+        head, history, current = self._assemble(state)
+        return self._fit(head, history, current)
+
+    def _assemble(self, state: Dict[str, Any]) -> Tuple[List[BaseMessage], List[BaseMessage], List[BaseMessage]]:
+        """Summary, earlier unfolded turns, and the current turn, before any budget cuts."""
+        messages = state["messages"]
+        summary = state.get("summary", "")
+        cursor = state.get("summary_cursor", 0)
+        turn_start = current_turn_start(messages)
+        head = [SystemMessage(content=SUMMARY_PREFIX + summary)] if summary else []
+        history = strip_tool_traffic(messages[cursor:turn_start])
+        current = [trim_tool_output(msg) for msg in messages[max(cursor, turn_start):]]
+        return head, history, current
+
+    def _fit(
+        self, head: List[BaseMessage], history: List[BaseMessage], current: List[BaseMessage]
+    ) -> List[BaseMessage]:
+        total = sum(map(message_tokens, head + history + current))
+        if total <= self.budget:
+            return head + history + current
+        before = total
+        # Results of the latest tool round follow the last AI message that made calls
+        last_round = max(
+            (i for i, msg in enumerate(current) if isinstance(msg, AIMessage) and msg.tool_calls), default=len(current)
+        )
+        # Stub rather than drop: every tool call still needs its ToolMessage
+        for i in range(last_round):
+            if total <= self.budget:
+                break
+            if isinstance(current[i], ToolMessage):
+                stub = current[i].model_copy(update={"content": OMITTED_TOOL_OUTPUT})
+                total -= message_tokens(current[i]) - message_tokens(stub)
+                current[i] = stub
+        # Still in the checkpoint; the next turn's compaction folds them into the summary
+        while history and total > self.budget:
+            total -= message_tokens(history.pop(0))
+        latest = [i for i in range(last_round, len(current)) if isinstance(current[i], ToolMessage)]
+        if total > self.budget and latest:
+            latest_tokens = sum(message_tokens(current[i]) for i in latest)
+            share = max(0, (self.budget - (total - latest_tokens)) // len(latest) - MESSAGE_OVERHEAD)
+            for i in latest:
+                msg = current[i]
+                if count_tokens(text_content(msg)) > share:
+                    text = truncate_text(text_content(msg), share)
+                    current[i] = msg.model_copy(update={"content": f"{text}\n[... tool output truncated]"})
+            total = sum(map(message_tokens, head + history + current))
+        logger.info(f"✂️ Prompt over budget mid-turn | ~{before} → ~{total} tokens (budget {self.budget})")
+        return head + history + current
+
+    def _past_turns(self, messages: Sequence[BaseMessage], cursor: int, turn_start: int) -> List[Tuple[int, int]]:
+        """(start, tokens) for each earlier turn that hasn't been folded yet."""
+        turns: List[Tuple[int, int]] = []
+        for index in range(cursor, turn_start):
+            msg = messages[index]
+            if isinstance(msg, HumanMessage) or not turns:
+                turns.append((index, 0))
+            start, tokens = turns[-1]
+            turns[-1] = (start, tokens + sum(map(message_tokens, strip_tool_traffic([msg]))))
+        return turns
+
+    async def compact(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """State update folding old turns into the summary; empty when within budget."""
+        messages = state["messages"]
+        summary = state.get("summary", "")
+        cursor = state.get("summary_cursor", 0)
+        turn_start = current_turn_start(messages)
+
+        head, history, current = self._assemble(state)
+        prompt_tokens = sum(map(message_tokens, head + history + current))
+        if prompt_tokens <= self.budget or cursor >= turn_start:
+            return {}
+
+        turns = self._past_turns(messages, cursor, turn_start)
+        remaining = prompt_tokens
+        new_cursor = cursor
+        target = self.budget * FOLD_TARGET
+        while turns and remaining > target:
+            _, tokens = turns.pop(0)
+            remaining -= tokens
+            new_cursor = turns[0][0] if turns else turn_start
+
+        folded = strip_tool_traffic(messages[cursor:new_cursor])
+        try:
+            summary = await self._extend_summary(summary, folded)
+        except Exception as e:
+            # Dropping the turns keeps the prompt bounded; losing them beats overflowing
+            logger.warning(f"Context summary failed, dropping {len(folded)} messages: {e}")
+        logger.info(
+            f"🗜️ Folded {new_cursor - cursor} messages into summary | "
+            f"Prompt ~{prompt_tokens} → ~{remaining} tokens"
+        )
+        return {"summary": summary, "summary_cursor": new_cursor}
+
+    async def _extend_summary(self, summary: str, messages: List[BaseMessage]) -> str:
+        transcript = "\n".join(
+            f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {text_content(msg)}"
+            for msg in messages
+        )
+        prompt = (
+            "Update the running summary of a conversation with the new messages below. "
+            "Keep facts, names, numbers, decisions and open questions the assistant may need later; "
+            f"stay under {settings.context_summary_max_tokens} tokens. Return ONLY the summary.\n\n"
+            f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{transcript}"
+        )
+        with timed(SUMMARY_DURATION, "summary"):
+            response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        return text_content(response).strip()
@@ -0,0 +1,101 @@
+"""Shared async SQLite connection pool."""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+import aiosqlite
+from backend.config import settings
+from backend.utils.exceptions import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+class SQLitePool:
+    """A fixed set of long-lived connections to ``settings.db_path``.
+
+    Every connection runs in WAL mode with a busy timeout, so readers never
+    block the checkpointer and writers wait instead of failing with
+    "database is locked". Keeping connections open also keeps sqlite3's
+    per-connection prepared statement cache warm.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, size: Optional[int] = None):
+        self.db_path = db_path or settings.db_path
+        self.size = size or settings.db_pool_size
+        self.checkpoint_connection: Optional[aiosqlite.Connection] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._waiting = 0
+        self._acquisitions = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = await aiosqlite.connect(
+            self.db_path, cached_statements=settings.db_statement_cache_size
+        )
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute(f"PRAGMA busy_timeout={settings.db_busy_timeout_ms}")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    async def initialize(self) -> None:
+        for _ in range(self.size):
+            conn = await self._connect()
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+        # AsyncSqliteSaver serializes access to a single connection itself
+        self.checkpoint_connection = await self._connect()
+        logger.info(f"✓ SQLite pool ready: {self.size} connections (WAL)")
+
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
+        if self.checkpoint_connection:
+            await self.checkpoint_connection.close()
+        self._connections = []
+        self.checkpoint_connection = None
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            conn = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        self._acquisitions += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        try:
+            yield conn
+        except BaseException:
+            # Never hand a connection with an open transaction to the next caller
+            await conn.rollback()
+            raise
+        finally:
+            self._idle.put_nowait(conn)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "waiting": self._waiting,
+            "acquisitions": self._acquisitions,
+            "wait_seconds_total": self._wait_total,
+            "wait_seconds_avg": self._wait_total / self._acquisitions if self._acquisitions else 0.0,
+            "wait_seconds_max": self._wait_max,
+        }
+
+
+_db_pool: Optional[SQLitePool] = None
+
+def set_db_pool(pool: Optional[SQLitePool]) -> None:
+    global _db_pool
+    _db_pool = pool
+
+def get_db_pool() -> SQLitePool:
+    if _db_pool is None:
+        raise DatabaseError("Database pool is not initialized")
+    return _db_pool
@@ -1,102 +1,272 @@
 """Refactored LangGraph manager."""
 import logging
-from typing import List, Dict, Any, AsyncIterator
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_openai import ChatOpenAI
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
+from cachetools import LRUCache
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
+from langgraph.prebuilt import tools_condition
 from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from typing import TypedDict, Annotated
 from backend.config import settings
+from backend.core.context import ContextManager, current_turn_start, text_content
+from backend.core.database import SQLitePool
+from backend.core.llm import create_chat_model
+from backend.core.mcp_tools import McpToolProvider
+from backend.core.metrics import (
+    CHECKPOINT_DURATION, MODEL_CALL_DURATION, StreamTimer, record_route, record_usage, timed
+)
+from backend.core.router import model_tiers, route_turn, tier_tools
+from backend.core.tool_cache import ToolResultCache
+from backend.core.tool_executor import ToolExecutor, tool_error
 from backend.core.tools import *
 from backend.models.schemas import Message, MessageRole
 
 logger = logging.getLogger(__name__)
 
+LOCAL_TOOLS = [
+    search_tool, get_stock_price, calculator, percentage_calc,
+    get_system_time, search_knowledge_base, save_to_knowledge_base
+]
+
 class ChatState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
+    summary: str
+    summary_cursor: int
+    tier: str
+
+def render_history(messages: List[BaseMessage]) -> List[Message]:
+    """User turns and assistant text only; tool results and tool-call markers are internal."""
+    rendered = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            role = MessageRole.USER
+        elif isinstance(msg, AIMessage):
+            role = MessageRole.ASSISTANT
+        else:
+            # ToolMessage, SystemMessage, ...
+            continue
+        content = text_content(msg)
+        if not content.strip():
+            # An AIMessage that only carries tool calls
+            continue
+        rendered.append(Message(role=role, content=content))
+    return rendered
+
+class InstrumentedSaver(AsyncSqliteSaver):
+    """AsyncSqliteSaver that reports checkpoint read/write latency."""
+
+    async def aget_tuple(self, config):
+        with timed(CHECKPOINT_DURATION, "checkpoint_read", operation="read"):
+            return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        with timed(CHECKPOINT_DURATION, "checkpoint_write", operation="write"):
+            return await super().aput(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        with timed(CHECKPOINT_DURATION, "checkpoint_write", operation="write_pending"):
+            return await super().aput_writes(config, writes, task_id, task_path)
 
 class GraphManager:
-    def __init__(self):
+    def __init__(self, db_pool: SQLitePool):
+        self.db_pool = db_pool
         self.graph = None
         self.saver = None
-        self.saver_context = None
-        self.llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            streaming=settings.llm_streaming,
-            temperature=settings.llm_temperature
-        )
-        self.mcp_client = MultiServerMCPClient({
-            "expense": {"transport": "sse", "url": settings.mcp_expense_url}
-        })
+        self.tool_cache = ToolResultCache()
+        # One executor for the process: graphs compiled after a tool swap share its limits
+        self.tool_executor = ToolExecutor(cache=self.tool_cache)
+        self.history_cache = LRUCache(maxsize=settings.history_cache_threads)
+        self.tier_llms = {
+            tier: create_chat_model(
+                model,
+                streaming=settings.llm_streaming,
+                temperature=settings.llm_temperature,
+                stream_usage=True
+            )
+            for tier, model in model_tiers().items()
+        }
+        self.context_manager = ContextManager(create_chat_model(
+            settings.context_summary_model,
+            temperature=0,
+            max_tokens=settings.context_summary_max_tokens,
+            disable_streaming=True
+        ))
+        self.mcp_tools = McpToolProvider(on_change=self._swap_mcp_tools)
     
     async def initialize(self) -> None:
         logger.info("Initializing LangGraph...")
-        self.saver_context = AsyncSqliteSaver.from_conn_string(settings.db_path)
-        self.saver = await self.saver_context.__aenter__()
-        all_tools = await self._load_tools()
-        self.graph = await self._compile_graph(all_tools)
-        logger.info(f"✓ Graph initialized with {len(all_tools)} tools")
+        # The checkpointer gets its own pooled connection; the pool owns its lifetime
+        self.saver = InstrumentedSaver(self.db_pool.checkpoint_connection)
+        await self.saver.setup()
+        # Cached MCP schemas only; the server is asked in the background
+        await self.mcp_tools.initialize()
+        tools = LOCAL_TOOLS + self.mcp_tools.tools
+        self.graph = await self._compile_graph(tools)
+        logger.info(f"✓ Graph initialized with {len(tools)} tools ({len(self.mcp_tools.tools)} MCP tools from cache)")
     
     async def cleanup(self) -> None:
-        if self.saver_context:
-            await self.saver_context.__aexit__(None, None, None)
+        await self.mcp_tools.close()
+        self.tool_executor.close()
+        self.graph = None
+        self.saver = None
     
-    async def _load_tools(self) -> List:
-        local_tools = [
-            search_tool, get_stock_price, calculator, percentage_calc,
-            get_system_time, search_knowledge_base, save_to_knowledge_base
-        ]
-        try:
-            remote_tools = await self.mcp_client.get_tools()
-            logger.info(f"✓ Loaded {len(remote_tools)} MCP tools")
-        except Exception as e:
-            logger.warning(f"Could not load MCP tools: {e}")
-            remote_tools = []
-        return local_tools + remote_tools
+    async def _swap_mcp_tools(self, remote_tools: List) -> None:
+        """Recompile with a new MCP tool set; turns already running finish on the old graph."""
+        tools = LOCAL_TOOLS + remote_tools
+        self.graph = await self._compile_graph(tools)
+        logger.info(f"🔄 Graph recompiled with {len(tools)} tools")
     
     async def _compile_graph(self, tools: List) -> Any:
-        llm_with_tools = self.llm.bind_tools(tools)
+        tier_llms = {}
+        tier_tool_nodes = {}
+        for tier, llm in self.tier_llms.items():
+            subset = tier_tools(tier, tools)
+            tier_llms[tier] = llm.bind_tools(subset) if subset else llm
+            # Executing from the same subset keeps a tier to its tools, not just its binding
+            tier_tool_nodes[tier] = self.tool_executor.node(subset)
+        
+        def state_tier(state: ChatState) -> str:
+            tier = state.get("tier")
+            # Checkpoints from before routing, or a tier since removed from config
+            return tier if tier in tier_llms else settings.routing_default_tier
+        
+        async def context_node(state: ChatState):
+            return await self.context_manager.compact(state)
+        
+        async def router_node(state: ChatState):
+            tier = route_turn(state["messages"])
+            record_route(tier)
+            return {"tier": tier}
         
         async def chat_node(state: ChatState):
-            response = await llm_with_tools.ainvoke(state["messages"])
+            tier = state_tier(state)
+            with timed(MODEL_CALL_DURATION, f"model:{tier}", tier=tier):
+                response = await tier_llms[tier].ainvoke(self.context_manager.build_prompt(state))
+            record_usage(tier, response.usage_metadata)
             return {"messages": [response]}
         
-        tool_node = ToolNode(tools)
+        async def tools_node(state: ChatState, config: RunnableConfig):
+            return await tier_tool_nodes[state_tier(state)](state, config)
+        
         workflow = StateGraph(ChatState)
+        workflow.add_node("context", context_node)
+        workflow.add_node("router", router_node)
         workflow.add_node("chat_node", chat_node)
-        workflow.add_node("tools", tool_node)
-        workflow.add_edge(START, "chat_node")
+        workflow.add_node("tools", tools_node)
+        workflow.add_edge(START, "context")
+        workflow.add_edge("context", "router")
+        workflow.add_edge("router", "chat_node")
         workflow.add_conditional_edges("chat_node", tools_condition)
         workflow.add_edge("tools", "chat_node")
         return workflow.compile(checkpointer=self.saver)
     
     async def stream_response(self, message: str, thread_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Stream one turn as token/tool events.
+
+        If the caller stops early (cancel, disconnect) the graph run is
+        cancelled with it, and the answer streamed so far is saved so the
+        thread stays consistent.
+        """
         config = {"configurable": {"thread_id": thread_id}}
-        async for event in self.graph.astream_events(
+        # Text of the latest model call. Kept after it ends: chat_node's checkpoint
+        # is only written once the node returns, so a cancel in between would lose it
+        partial: List[str] = []
+        finished: Optional[AIMessage] = None
+        completed = False
+        timer = StreamTimer()
+        events = self.graph.astream_events(
             {"messages": [HumanMessage(content=message)]}, config, version="v2"
-        ):
-            event_kind = event["event"]
-            if event_kind == "on_chat_model_stream":
-                content = event["data"]["chunk"].content
-                if content:
-                    yield {"type": "token", "content": content}
-            elif event_kind == "on_tool_start":
-                yield {"type": "tool_start", "name": event.get("name", "unknown")}
-            elif event_kind == "on_tool_end":
-                yield {"type": "tool_end", "name": event.get("name", "unknown")}
+        )
+        try:
+            async for event in events:
+                event_kind = event["event"]
+                if event_kind == "on_chat_model_start":
+                    partial, finished = [], None
+                elif event_kind == "on_chat_model_end":
+                    finished = event["data"].get("output")
+                elif event_kind == "on_chat_model_stream":
+                    content = event["data"]["chunk"].content
+                    if content:
+                        timer.token()
+                        if isinstance(content, str):
+                            partial.append(content)
+                        yield {"type": "token", "content": content}
+                elif event_kind == "on_tool_start":
+                    yield {"type": "tool_start", "name": event.get("name", "unknown")}
+                elif event_kind == "on_tool_end":
+                    yield {"type": "tool_end", "name": event.get("name", "unknown")}
+                elif event_kind == "on_tool_error":
+                    yield {"type": "tool_error", "name": event.get("name", "unknown")}
+                elif event_kind == "on_custom_event" and event["name"] == "tool_timeout":
+                    yield {"type": "tool_error", "name": event["data"]["name"]}
+            completed = True
+        finally:
+            # Closing the event stream cancels the run and its pending tool calls
+            await events.aclose()
+            timer.finish()
+            if not completed:
+                await self._save_interrupted(config, "".join(partial), finished)
+            self.invalidate_history(thread_id)
     
-    async def get_thread_history(self, thread_id: str) -> List[Message]:
-        config = {"configurable": {"thread_id": thread_id}}
-        state = await self.graph.aget_state(config)
-        messages = []
-        for msg in state.values.get("messages", []):
-            role = MessageRole.USER if isinstance(msg, HumanMessage) else MessageRole.ASSISTANT
-            messages.append(Message(role=role, content=msg.content))
-        return messages
+    async def _save_interrupted(
+        self, config: Dict[str, Any], partial_answer: str, finished: Optional[AIMessage] = None
+    ) -> None:
+        """Close out a stopped turn: answer dangling tool calls and keep the partial text.
+
+        ``finished`` is the last model call's output if it completed; once
+        it is in the checkpoint there is no partial text left to add.
+        """
+        try:
+            state = await self.graph.aget_state(config)
+            messages = state.values.get("messages", [])
+            if finished is not None and any(
+                msg.id == finished.id if finished.id else isinstance(msg, AIMessage) and msg.content == finished.content
+                for msg in messages[current_turn_start(messages):]
+            ):
+                partial_answer = ""
+            answered = {msg.tool_call_id for msg in messages if isinstance(msg, ToolMessage)}
+            patch: List[BaseMessage] = []
+            for msg in reversed(messages):
+                if isinstance(msg, AIMessage):
+                    patch.extend(
+                        tool_error(call, "cancelled", "The response was stopped before this tool finished.")
+                        for call in msg.tool_calls if call["id"] not in answered
+                    )
+                    break
+            if partial_answer:
+                patch.append(AIMessage(content=partial_answer, response_metadata={"finish_reason": "cancelled"}))
+            if patch:
+                # As chat_node with no tool calls last, the thread ends up idle rather than mid-step
+                await self.graph.aupdate_state(config, {"messages": patch}, as_node="chat_node")
+            logger.info(f"⏹️ Run stopped | Saved {len(partial_answer)} chars, {len(patch)} messages")
+        except Exception as e:
+            logger.error(f"Could not save interrupted run: {e}", exc_info=True)
+    
+    def invalidate_history(self, thread_id: str) -> None:
+        self.history_cache.pop(thread_id, None)
+    
+    async def get_thread_history(
+        self, thread_id: str, limit: Optional[int] = None, before: Optional[int] = None
+    ) -> Tuple[List[Message], Optional[int]]:
+        """Page backwards through a thread's rendered history.
+
+        ``before`` is the index of the oldest message already shown; the page
+        ends just before it. Returns the page in chronological order and the
+        cursor for the previous page (None at the start of the thread). The
+        rendered thread is cached until the next turn on it completes.
+        """
+        rendered = self.history_cache.get(thread_id)
+        if rendered is None:
+            config = {"configurable": {"thread_id": thread_id}}
+            state = await self.graph.aget_state(config)
+            rendered = render_history(state.values.get("messages", []))
+            self.history_cache[thread_id] = rendered
+        
+        end = len(rendered) if before is None else max(0, min(before, len(rendered)))
+        start = 0 if limit is None else max(0, end - limit)
+        return rendered[start:end], (start or None)
     
     async def is_first_message(self, thread_id: str) -> bool:
         try:
@@ -0,0 +1,218 @@
+"""Shared outbound HTTP clients with per-host pools, retries and reuse metrics."""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+import httpx
+from backend.config import settings
+from backend.utils.exceptions import HttpClientError
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+    retries: int = 0
+    errors: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Share of requests that went out on an already open connection."""
+        return 1 - self.new_connections / self.requests if self.requests else 0.0
+
+    def record(self, event: str) -> None:
+        # httpcore trace events, e.g. "connection.start_tls.complete"
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+def _host_key(url: httpx.URL) -> str:
+    return f"{url.scheme}://{url.host}" + (f":{url.port}" if url.port else "")
+
+def _limits(host: str) -> httpx.Limits:
+    size = settings.http_host_limits.get(host, settings.http_max_connections_per_host)
+    return httpx.Limits(
+        max_connections=size,
+        max_keepalive_connections=size,
+        keepalive_expiry=settings.http_keepalive_expiry
+    )
+
+def _should_retry(request: httpx.Request, response: httpx.Response, attempt: int) -> bool:
+    return (
+        response.status_code in RETRYABLE_STATUS
+        and request.method in IDEMPOTENT_METHODS
+        and attempt < settings.http_max_retries
+    )
+
+def _backoff(attempt: int, response: httpx.Response) -> float:
+    retry_after = response.headers.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), settings.http_backoff_max)
+    return min(settings.http_backoff_base * 2 ** attempt, settings.http_backoff_max) * random.uniform(0.5, 1.0)
+
+class _AsyncRoutingTransport(httpx.AsyncBaseTransport):
+    """One keep-alive pool per host, so each host gets its own connection limit."""
+
+    def __init__(self, stats: Dict[str, HostStats]):
+        self.stats = stats
+        self.transports: Dict[str, httpx.AsyncHTTPTransport] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = _host_key(request.url)
+        stats = self.stats.setdefault(host, HostStats())
+        transport = self.transports.get(host)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                http2=settings.http_http2, limits=_limits(host), retries=settings.http_connect_retries
+            )
+            self.transports[host] = transport
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            stats.record(event)
+        request.extensions = {**request.extensions, "trace": trace}
+
+        attempt = 0
+        while True:
+            stats.requests += 1
+            try:
+                response = await transport.handle_async_request(request)
+            except httpx.TransportError:
+                stats.errors += 1
+                raise
+            if not _should_retry(request, response, attempt):
+                return response
+            await response.aclose()
+            stats.retries += 1
+            await asyncio.sleep(_backoff(attempt, response))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        for transport in self.transports.values():
+            await transport.aclose()
+        self.transports = {}
+
+class _RoutingTransport(httpx.BaseTransport):
+    """Sync twin of _AsyncRoutingTransport for SDK code paths that aren't async."""
+
+    def __init__(self, stats: Dict[str, HostStats]):
+        self.stats = stats
+        self.transports: Dict[str, httpx.HTTPTransport] = {}
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        host = _host_key(request.url)
+        stats = self.stats.setdefault(host, HostStats())
+        transport = self.transports.get(host)
+        if transport is None:
+            transport = httpx.HTTPTransport(
+                http2=settings.http_http2, limits=_limits(host), retries=settings.http_connect_retries
+            )
+            self.transports[host] = transport
+
+        def trace(event: str, info: Dict[str, Any]) -> None:
+            stats.record(event)
+        request.extensions = {**request.extensions, "trace": trace}
+
+        attempt = 0
+        while True:
+            stats.requests += 1
+            try:
+                response = transport.handle_request(request)
+            except httpx.TransportError:
+                stats.errors += 1
+                raise
+            if not _should_retry(request, response, attempt):
+                return response
+            response.close()
+            stats.retries += 1
+            time.sleep(_backoff(attempt, response))
+            attempt += 1
+
+    def close(self) -> None:
+        for transport in self.transports.values():
+            transport.close()
+        self.transports = {}
+
+class _BorrowedTransport(httpx.AsyncBaseTransport):
+    """Lets short-lived clients use the shared pools without closing them."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        pass
+
+class HttpClientManager:
+    """Outbound HTTP for the whole app; created once in the lifespan.
+
+    Tools, the OpenAI clients and the MCP client all go through the same
+    HTTP/2 keep-alive pools, so TLS handshakes are paid once per host rather
+    than once per call. Idempotent requests are retried on 429/502/503/504
+    and connection failures are retried for every method.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, HostStats] = {}
+        self.timeout = httpx.Timeout(
+            settings.http_timeout, connect=settings.http_connect_timeout, pool=settings.http_pool_timeout
+        )
+        self.async_client: Optional[httpx.AsyncClient] = None
+        self.sync_client: Optional[httpx.Client] = None
+        self._async_transport: Optional[_AsyncRoutingTransport] = None
+
+    async def initialize(self) -> None:
+        self._async_transport = _AsyncRoutingTransport(self.stats)
+        self.async_client = httpx.AsyncClient(transport=self._async_transport, timeout=self.timeout)
+        self.sync_client = httpx.Client(transport=_RoutingTransport(self.stats), timeout=self.timeout)
+        logger.info(f"✓ HTTP clients ready (HTTP/2: {settings.http_http2})")
+
+    async def close(self) -> None:
+        if self.async_client:
+            await self.async_client.aclose()
+        if self.sync_client:
+            self.sync_client.close()
+        self.async_client = None
+        self.sync_client = None
+
+    def mcp_client_factory(
+        self,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        auth: Optional[httpx.Auth] = None
+    ) -> httpx.AsyncClient:
+        """``httpx_client_factory`` for MCP sessions, which close their client on exit."""
+        return httpx.AsyncClient(
+            transport=_BorrowedTransport(self._async_transport),
+            headers=headers,
+            timeout=timeout or self.timeout,
+            auth=auth,
+            follow_redirects=True
+        )
+
+    def stats_snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            host: {**asdict(stats), "reuse_ratio": stats.reuse_ratio}
+            for host, stats in self.stats.items()
+        }
+
+
+_http_clients: Optional[HttpClientManager] = None
+
+def set_http_clients(manager: Optional[HttpClientManager]) -> None:
+    global _http_clients
+    _http_clients = manager
+
+def get_http_clients() -> HttpClientManager:
+    if _http_clients is None:
+        raise HttpClientError("HTTP clients are not initialized")
+    return _http_clients
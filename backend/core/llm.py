@@ -0,0 +1,51 @@
+"""Chat model and embedding construction; ``llm_provider``/``embedding_provider`` pick real or fake.
+
+Provider packages are imported on first construction, so importing the app stays cheap.
+"""
+from typing import Any
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from backend.config import settings
+from backend.core.http_client import HttpClientManager, get_http_clients
+
+def create_chat_model(model: str, **kwargs: Any) -> BaseChatModel:
+    """An OpenAI chat model on the shared HTTP clients, or the benchmark fake.
+
+    ``kwargs`` are ChatOpenAI options; the fake honours only ``disable_streaming``.
+    """
+    if settings.llm_provider == "fake":
+        from backend.benchmarks.fakes import FakeChatModel
+        return FakeChatModel(
+            ttft=settings.fake_llm_ttft_ms / 1000,
+            tokens_per_second=settings.fake_llm_tokens_per_second,
+            response_tokens=settings.fake_llm_response_tokens,
+            disable_streaming=kwargs.get("disable_streaming", False)
+        )
+    from langchain_openai import ChatOpenAI
+    http = get_http_clients()
+    return ChatOpenAI(
+        model=model,
+        api_key=settings.openai_api_key,
+        http_client=http.sync_client,
+        http_async_client=http.async_client,
+        **kwargs
+    )
+
+def embedding_model_name() -> str:
+    """Key for the embedding cache, so fake vectors never mix with real ones."""
+    if settings.embedding_provider == "fake":
+        return "fake-hashing"
+    return settings.embedding_model
+
+def create_embeddings(http: HttpClientManager) -> Embeddings:
+    if settings.embedding_provider == "fake":
+        from backend.benchmarks.fakes import HashingEmbeddings
+        return HashingEmbeddings(latency=settings.fake_embedding_latency_ms / 1000)
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(
+        model=settings.embedding_model,
+        openai_api_key=settings.openai_api_key,
+        request_timeout=settings.embedding_timeout,
+        http_client=http.sync_client,
+        http_async_client=http.async_client
+    )
@@ -0,0 +1,240 @@
+"""MCP tool discovery with an on-disk schema cache and a circuit breaker."""
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import os
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from backend.config import settings
+from backend.core.http_client import get_http_clients
+from backend.utils.exceptions import CircuitOpenError
+
+if TYPE_CHECKING:
+    from mcp.types import Tool as MCPTool
+
+logger = logging.getLogger(__name__)
+
+SERVER = "expense"
+T = TypeVar("T")
+
+class CircuitBreaker:
+    """Fails fast once ``failure_threshold`` calls in a row have failed.
+
+    While open every call is refused for ``reset_seconds``; then a single
+    probe is let through, and its outcome closes or re-opens the breaker.
+    A ``ToolException`` means the server answered, so it counts as success.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.retry_in() == 0 else "open"
+
+    def retry_in(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self.probing or self.retry_in() > 0:
+            return False
+        self.probing = True
+        return True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"🔌 {self.name} circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is None and self.failures < self.failure_threshold:
+            return
+        if self.opened_at is None:
+            logger.warning(f"🔌 {self.name} circuit opened after {self.failures} failures")
+        self.opened_at = time.monotonic()
+
+    async def call(self, func: Callable[[], Awaitable[T]], timeout: float) -> T:
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} is unavailable; retrying in {self.retry_in():.0f}s")
+        try:
+            async with asyncio.timeout(timeout):
+                result = await func()
+        except ToolException:
+            self.record_success()
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by the caller: no verdict on the server
+            self.probing = False
+            raise
+        except Exception as e:
+            self.record_failure()
+            # The MCP transport wraps connection errors in task-group exception groups
+            while isinstance(e, ExceptionGroup) and len(e.exceptions) == 1:
+                e = e.exceptions[0]
+            raise e
+        self.record_success()
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures, "retry_in": round(self.retry_in(), 1)}
+
+class McpToolProvider:
+    """MCP tools for the graph, without making startup wait for the server.
+
+    ``initialize`` loads the tool schemas last seen on the server from
+    ``mcp_tool_cache_path`` and starts discovery in the background, repeated
+    every ``mcp_refresh_interval_seconds``. When the server's tool set
+    differs from the current one, the cache is rewritten and ``on_change``
+    gets the new tools. Discovery and every tool call share one circuit
+    breaker, so while the server is down turns get an error result at once
+    instead of waiting out a timeout. The MCP SDK is imported on a worker
+    thread, only once there are cached schemas or a server to talk to.
+    """
+
+    def __init__(self, on_change: Callable[[List[BaseTool]], Awaitable[None]]):
+        self.connection = {
+            "transport": "sse",
+            "url": settings.mcp_expense_url,
+            "httpx_client_factory": get_http_clients().mcp_client_factory
+        }
+        self.breaker = CircuitBreaker(
+            f"MCP {SERVER}", settings.mcp_breaker_failures, settings.mcp_breaker_reset_seconds
+        )
+        self.on_change = on_change
+        self.schemas: List[Dict[str, Any]] = []
+        self.tools: List[BaseTool] = []
+        self.source = "none"  # "cache" until the server has confirmed the tool set
+        self.refreshed_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        schemas = await asyncio.to_thread(self._read_cache)
+        if schemas:
+            # Building the tools imports the adapter package; keep that off the event loop too
+            tools = await asyncio.to_thread(self._build_all, schemas)
+            self.tools, self.schemas, self.source = tools, schemas, "cache"
+            logger.info(f"✓ Loaded {len(self.tools)} MCP tools from cache")
+        self.task = asyncio.create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def refresh(self) -> bool:
+        """Re-list the server's tools; True if the tool set changed."""
+        schemas = await self.breaker.call(self._discover, settings.mcp_timeout_seconds)
+        self.refreshed_at = time.time()
+        if schemas == self.schemas:
+            self.source = "server"
+            return False
+        tools = self._build_all(schemas)
+        # Commit only once the graph has the new tools, so a failed swap is retried next refresh
+        await self.on_change(tools)
+        self.tools, self.schemas, self.source = tools, schemas, "server"
+        await asyncio.to_thread(self._write_cache, schemas)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "tools": [tool.name for tool in self.tools],
+            "refreshed_at": self.refreshed_at,
+            "breaker": self.breaker.stats(),
+        }
+
+    async def _refresh_loop(self) -> None:
+        await asyncio.to_thread(importlib.import_module, "langchain_mcp_adapters.client")
+        while True:
+            try:
+                if await self.refresh():
+                    logger.info(f"✓ Loaded {len(self.tools)} MCP tools: {', '.join(t.name for t in self.tools)}")
+                if settings.mcp_refresh_interval_seconds <= 0:
+                    return
+                delay = settings.mcp_refresh_interval_seconds
+            except Exception as e:
+                logger.warning(f"Could not load MCP tools: {e}")
+                delay = self.breaker.retry_in() or settings.mcp_breaker_reset_seconds
+            await asyncio.sleep(delay)
+
+    async def _discover(self) -> List[Dict[str, Any]]:
+        from langchain_mcp_adapters.client import MultiServerMCPClient
+        tools: List["MCPTool"] = []
+        async with MultiServerMCPClient({SERVER: self.connection}).session(SERVER) as session:
+            cursor = None
+            while True:
+                page = await session.list_tools(cursor=cursor)
+                tools.extend(page.tools)
+                cursor = page.nextCursor
+                if not cursor:
+                    break
+        return [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+
+    def _build_all(self, schemas: List[Dict[str, Any]]) -> List[BaseTool]:
+        from mcp.types import Tool as MCPTool
+        return [self._build(MCPTool.model_validate(schema)) for schema in schemas]
+
+    def _build(self, tool: "MCPTool") -> BaseTool:
+        from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+        # Without a session the adapter opens one per call from the connection config
+        converted = convert_mcp_tool_to_langchain_tool(None, tool, connection=self.connection, server_name=SERVER)
+        call_tool = converted.coroutine
+
+        @functools.wraps(call_tool)
+        async def guarded(*args: Any, **kwargs: Any) -> Any:
+            return await self.breaker.call(lambda: call_tool(*args, **kwargs), settings.mcp_timeout_seconds)
+
+        return StructuredTool(
+            name=converted.name,
+            description=converted.description,
+            args_schema=converted.args_schema,
+            coroutine=guarded,
+            response_format=converted.response_format,
+            metadata=converted.metadata
+        )
+
+    def _read_cache(self) -> List[Dict[str, Any]]:
+        try:
+            with open(settings.mcp_tool_cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("url") != settings.mcp_expense_url:
+                return []
+            from mcp.types import Tool as MCPTool
+            schemas = data["tools"]
+            for schema in schemas:
+                MCPTool.model_validate(schema)
+            return schemas
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring MCP tool cache {settings.mcp_tool_cache_path}: {e}")
+            return []
+
+    def _write_cache(self, schemas: List[Dict[str, Any]]) -> None:
+        path = settings.mcp_tool_cache_path
+        tmp = f"{path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"url": settings.mcp_expense_url, "saved_at": time.time(), "tools": schemas}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not save MCP tool cache {path}: {e}")
@@ -0,0 +1,251 @@
+"""Prometheus metrics and per-turn stage traces."""
+import asyncio
+import functools
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+from prometheus_client import Counter, Gauge, Histogram
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+EXEMPLAR_MAX_CHARS = 128
+
+TTFT = Histogram(
+    "chat_time_to_first_token_seconds", "From the start of a turn to its first streamed token",
+    buckets=LATENCY_BUCKETS
+)
+TOKENS_PER_SECOND = Histogram(
+    "chat_tokens_per_second", "Streaming rate of an answer after its first token",
+    buckets=(1, 5, 10, 20, 40, 60, 80, 100, 150, 200, 400)
+)
+TURN_DURATION = Histogram("chat_turn_duration_seconds", "Whole chat turn", buckets=LATENCY_BUCKETS)
+TOOL_DURATION = Histogram(
+    "tool_call_duration_seconds", "Tool call including the wait for a slot", ["tool", "status"],
+    buckets=LATENCY_BUCKETS
+)
+RETRIEVAL_DURATION = Histogram(
+    "retrieval_duration_seconds", "Knowledge base search", ["method"], buckets=LATENCY_BUCKETS
+)
+CHECKPOINT_DURATION = Histogram(
+    "checkpoint_duration_seconds", "LangGraph checkpoint reads and writes", ["operation"],
+    buckets=LATENCY_BUCKETS
+)
+THREAD_DB_DURATION = Histogram(
+    "thread_db_duration_seconds", "Thread summary queries", ["operation"], buckets=LATENCY_BUCKETS
+)
+SUMMARY_DURATION = Histogram(
+    "context_summary_duration_seconds", "Model call folding old turns into the running summary",
+    buckets=LATENCY_BUCKETS
+)
+MODEL_CALL_DURATION = Histogram(
+    "chat_model_call_duration_seconds", "One chat model call, by routing tier", ["tier"],
+    buckets=LATENCY_BUCKETS
+)
+MODEL_TOKENS = Counter("chat_model_tokens", "Tokens used by chat model calls", ["tier", "kind"])
+ROUTED_TURNS = Counter("chat_routed_turns", "Turns dispatched to each routing tier", ["tier"])
+ACTIVE_WEBSOCKETS = Gauge("websocket_connections_active", "Open chat WebSocket connections")
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late a timer fires on the server's event loop",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+class TurnTrace:
+    """Where the time of one chat turn went, tagged with its thread and run."""
+
+    def __init__(self, thread_id: str, run_id: str):
+        self.thread_id = thread_id
+        self.run_id = run_id
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.ttft: Optional[float] = None
+        self.tokens = 0
+        self.tokens_per_second: Optional[float] = None
+        self.tier: Optional[str] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.stages: List[Tuple[str, float]] = []
+
+    @property
+    def exemplar(self) -> Dict[str, str]:
+        # prometheus_client rejects exemplars whose label names and values exceed 128 chars
+        room = EXEMPLAR_MAX_CHARS - len("thread_id") - len("run_id") - len(self.run_id)
+        return {"thread_id": self.thread_id[:max(0, room)], "run_id": self.run_id}
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages.append((stage, seconds))
+
+    def breakdown(self) -> Dict[str, Dict[str, float]]:
+        totals: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+        for stage, seconds in self.stages:
+            totals[stage]["count"] += 1
+            totals[stage]["seconds"] += seconds
+        return dict(totals)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "thread_id": self.thread_id,
+            "run_id": self.run_id,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "ttft": self.ttft,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "tier": self.tier,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "stages": self.breakdown(),
+        }
+
+_current_trace: ContextVar[Optional[TurnTrace]] = ContextVar("turn_trace", default=None)
+recent_traces: Deque[TurnTrace] = deque(maxlen=settings.metrics_trace_history)
+
+def current_trace() -> Optional[TurnTrace]:
+    return _current_trace.get()
+
+@contextmanager
+def trace_turn(thread_id: str, run_id: str) -> Iterator[TurnTrace]:
+    """Collects stage timings from everything the turn runs, graph node tasks included."""
+    trace = TurnTrace(thread_id, run_id)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.duration = time.perf_counter() - trace.started
+        TURN_DURATION.observe(trace.duration, exemplar=trace.exemplar)
+        recent_traces.append(trace)
+        stages = ", ".join(
+            f"{stage} {totals['seconds']:.2f}s×{totals['count']}" for stage, totals in trace.breakdown().items()
+        )
+        ttft = f"{trace.ttft:.2f}s" if trace.ttft is not None else "-"
+        logger.info(
+            f"🧭 Turn {run_id[:8]} | Thread: {thread_id[:8]} | Tier: {trace.tier or '-'} | {trace.duration:.2f}s | "
+            f"TTFT: {ttft} | Tokens: {trace.tokens} ({trace.input_tokens} in, {trace.output_tokens} out) | "
+            f"{stages or 'no stages'}"
+        )
+
+def _median(values: List[float]) -> Optional[float]:
+    values = sorted(v for v in values if v is not None)
+    return values[len(values) // 2] if values else None
+
+def tier_summary() -> Dict[str, Dict[str, Any]]:
+    """Recent turns per routing tier: how many, how fast, and how many tokens they used."""
+    by_tier: Dict[str, List[TurnTrace]] = defaultdict(list)
+    for trace in recent_traces:
+        by_tier[trace.tier or "unrouted"].append(trace)
+    return {
+        tier: {
+            "turns": len(traces),
+            "median_duration": _median([trace.duration for trace in traces]),
+            "median_ttft": _median([trace.ttft for trace in traces]),
+            "mean_input_tokens": sum(trace.input_tokens for trace in traces) / len(traces),
+            "mean_output_tokens": sum(trace.output_tokens for trace in traces) / len(traces),
+        }
+        for tier, traces in by_tier.items()
+    }
+
+def observe(histogram: Histogram, stage: str, seconds: float, **labels: str) -> None:
+    (histogram.labels(**labels) if labels else histogram).observe(seconds)
+    trace = _current_trace.get()
+    if trace:
+        trace.add(stage, seconds)
+
+@contextmanager
+def timed(histogram: Histogram, stage: str, **labels: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(histogram, stage, time.perf_counter() - started, **labels)
+
+def record_route(tier: str) -> None:
+    ROUTED_TURNS.labels(tier=tier).inc()
+    trace = _current_trace.get()
+    if trace:
+        trace.tier = tier
+
+def record_usage(tier: str, usage: Optional[Dict[str, Any]]) -> None:
+    """Token usage of one model call, from the message's ``usage_metadata``."""
+    if not usage:
+        return
+    input_tokens, output_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    MODEL_TOKENS.labels(tier=tier, kind="input").inc(input_tokens)
+    MODEL_TOKENS.labels(tier=tier, kind="output").inc(output_tokens)
+    trace = _current_trace.get()
+    if trace:
+        trace.input_tokens += input_tokens
+        trace.output_tokens += output_tokens
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+def timed_method(histogram: Histogram, stage: str) -> Callable[[F], F]:
+    """Times an async method under ``operation=<method name>``."""
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timed(histogram, f"{stage}:{func.__name__}", operation=func.__name__):
+                return await func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+class StreamTimer:
+    """Time to first token and token rate of one streamed turn."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.tokens = 0
+
+    def token(self) -> None:
+        self.tokens += 1
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+            ttft = self.first_token - self.started
+            trace = _current_trace.get()
+            if trace:
+                trace.ttft = ttft
+            TTFT.observe(ttft, exemplar=trace.exemplar if trace else None)
+
+    def finish(self) -> None:
+        trace = _current_trace.get()
+        if trace:
+            trace.tokens = self.tokens
+        if self.first_token is None or self.tokens < 2:
+            return
+        elapsed = time.perf_counter() - self.first_token
+        if elapsed <= 0:
+            return
+        rate = (self.tokens - 1) / elapsed
+        TOKENS_PER_SECOND.observe(rate)
+        if trace:
+            trace.tokens_per_second = rate
+
+class LoopLagMonitor:
+    """Samples event-loop lag every ``metrics_loop_lag_interval`` seconds; anything blocking the loop shows up here."""
+
+    def __init__(self):
+        self.interval = settings.metrics_loop_lag_interval
+        self.task: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        if self.interval > 0:
+            self.task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            EVENT_LOOP_LAG.observe(max(0.0, loop.time() - started - self.interval))
@@ -0,0 +1,81 @@
+"""Per-turn model tier routing with a local heuristic (no model call)."""
+import re
+from typing import Dict, List, Sequence
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.tools import BaseTool
+from backend.config import settings
+from backend.core.context import text_content
+
+LIGHT_TIER = "light"
+
+# Documents, the web, expenses, or reasoning over several steps
+_NEEDS_DEFAULT = re.compile(
+    r"\b(document|pdf|file|upload|knowledge|notes?|remember|save|search|look up|news|latest|research|"
+    r"expense|spend|compare|explain|why|analy[sz]|summar|step|plan|write|code|translate|recommend)",
+    re.IGNORECASE
+)
+# A question about something the light tier's tools can't see: documents, records, events
+_QUESTION = re.compile(r"\b(?:who|what|when|where|which|how|is|are|was|were|did|does|do)\b", re.IGNORECASE)
+_DOCUMENT_OR_EVENT = re.compile(
+    r"\b(report|contract|deadline|policy|paper|article|invoice|email|revenue|sales|game|match|election|"
+    r"market|event|happen|won|win|score|caused|since|history|dose|safe)",
+    re.IGNORECASE
+)
+# The light tier only takes messages that are nothing but one of these
+_LEAD_IN = r"^\s*(?:(?:what(?:'s| is)|calculate|compute|how much is)\s+)?"
+_ARITHMETIC = re.compile(
+    _LEAD_IN + r"(?:"
+    r"[-+]?\d[\d.,]*(?:\s*[-+*/×÷^]\s*\(?\s*[-+]?\d[\d.,]*\s*\)?)+"  # 12 * 7, 3.5 + (2 / 4)
+    r"|\d[\d.,]*\s*(?:%|percent)\s+of\s+\d[\d.,]*"  # 15% of 80
+    r"|\d[\d.,]*\s+(?:plus|minus|times|multiplied by|divided by)\s+\d[\d.,]*"
+    r")\s*[=?.!]*\s*$",
+    re.IGNORECASE
+)
+_TIME = re.compile(
+    r"^\s*(?:what(?:'s| is) the (?:current )?(?:time|date)(?: now| today)?|what time is it(?: now)?|"
+    r"what day is (?:it|today))(?: in [a-z .'-]{2,40})?\s*[?.!]*\s*$",
+    re.IGNORECASE
+)
+_STOCK = re.compile(
+    r"^\s*(?:(?:what(?:'s| is) )?(?:the )?(?:current )?(?:stock |share )?(?:price|quote) (?:of|for) [a-z.]{1,6}"
+    r"|[a-z.]{1,6} (?:stock |share )?(?:price|quote))\s*[?.!]*\s*$",
+    re.IGNORECASE
+)
+_SMALL_TALK = re.compile(
+    r"^\s*(?:hi|hello|hey|thanks|thank you|ok|okay|cool|great|bye|good (?:morning|evening|night))\b[\s!.?]*$",
+    re.IGNORECASE
+)
+
+def model_tiers() -> Dict[str, str]:
+    """Tier name -> model; the default tier runs ``llm_model`` unless ``model_tiers`` overrides it."""
+    return {settings.routing_default_tier: settings.llm_model, **settings.model_tiers}
+
+def tier_tools(tier: str, tools: Sequence[BaseTool]) -> List[BaseTool]:
+    names = settings.model_tier_tools.get(tier)
+    if names is None:
+        return list(tools)
+    return [tool for tool in tools if tool.name in names]
+
+def classify_turn(text: str) -> str:
+    """The light tier for messages that are only arithmetic, a clock query, a quote or small talk.
+
+    Anything else, including a question that merely contains numbers or dates,
+    takes the default tier: a wrong "light" costs answer quality, a wrong
+    default only costs money.
+    """
+    default = settings.routing_default_tier
+    if not settings.routing_enabled or LIGHT_TIER not in model_tiers():
+        return default
+    if len(text) > settings.routing_light_max_chars or text.count("?") > 1 or _NEEDS_DEFAULT.search(text):
+        return default
+    if _QUESTION.search(text) and _DOCUMENT_OR_EVENT.search(text):
+        return default
+    if any(pattern.match(text) for pattern in (_SMALL_TALK, _ARITHMETIC, _TIME, _STOCK)):
+        return LIGHT_TIER
+    return default
+
+def route_turn(messages: Sequence[BaseMessage]) -> str:
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            return classify_turn(text_content(msg))
+    return settings.routing_default_tier
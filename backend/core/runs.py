@@ -0,0 +1,204 @@
+"""Per-run event buffers so a dropped WebSocket can resume a response."""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from backend.config import settings
+from backend.utils.exceptions import RunResumeError
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+
+def _event_size(event: Event) -> int:
+    # Rough bytes held; only string payloads (tokens, statuses) matter
+    return 64 + sum(len(value) for value in event.values() if isinstance(value, str))
+
+class RunBuffer:
+    """The events of one run, numbered from 0, in a ring of ``run_buffer_max_events``.
+
+    ``first_offset`` is the oldest event still held and ``next_offset`` the
+    number published so far. Followers wait on ``_wake``, which is replaced
+    on every publish. ``answered`` is set once the reply is complete; the run
+    may stay open after that for trailing events such as the thread title.
+    """
+
+    def __init__(self, thread_id: str, user_id: Optional[str]):
+        self.run_id = str(uuid.uuid4())
+        self.thread_id = thread_id
+        self.user_id = user_id
+        self.events: Deque[Tuple[int, Event, int]] = deque()
+        self.first_offset = 0
+        self.next_offset = 0
+        self.bytes = 0
+        self.done = False
+        self.answered = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self.followers = 0
+        self.abandon_timer: Optional[asyncio.TimerHandle] = None
+        self._wake = asyncio.Event()
+
+    def publish(self, event: Event) -> None:
+        size = _event_size(event)
+        self.events.append((self.next_offset, event, size))
+        self.next_offset += 1
+        self.bytes += size
+        while len(self.events) > settings.run_buffer_max_events:
+            _, _, dropped = self.events.popleft()
+            self.bytes -= dropped
+            self.first_offset += 1
+        self._notify()
+
+    def finish(self) -> None:
+        self.done = True
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._wake.set()
+        self._wake = asyncio.Event()
+
+    async def follow(self, offset: int) -> AsyncIterator[Tuple[int, Event]]:
+        """Events from ``offset`` on, then the live tail until the run finishes."""
+        if offset > self.next_offset:
+            raise RunResumeError(f"Offset {offset} is past the end of the run")
+        while True:
+            while offset < self.next_offset:
+                if offset < self.first_offset:
+                    # Resumed too late, or read too slowly to keep up with the ring
+                    raise RunResumeError(
+                        f"Output before offset {self.first_offset} is no longer buffered",
+                        details={"first_offset": self.first_offset}
+                    )
+                seq, event, _ = self.events[offset - self.first_offset]
+                offset += 1
+                yield seq, event
+            if self.done:
+                return
+            await self._wake.wait()
+
+class RunRegistry:
+    """Runs every chat turn as a task that outlives the connection that started it.
+
+    Each run publishes its client events into a ``RunBuffer``; connections
+    only follow buffers, so a client that reconnects with
+    ``{"resume": run_id, "offset": n}`` gets what it missed and then the
+    live tail instead of paying for the turn again. A run nobody follows for
+    ``run_disconnect_grace_seconds`` is cancelled. Finished buffers are kept
+    for ``run_buffer_ttl_seconds``, and the oldest finished ones are evicted
+    early once all buffers together exceed ``run_buffers_max_bytes``. Purging
+    runs on every start and lookup and again when a finished buffer's TTL
+    runs out, so an idle server still lets go of them.
+    """
+
+    def __init__(self):
+        self.runs: Dict[str, RunBuffer] = {}
+        self.finished: "OrderedDict[str, None]" = OrderedDict()
+        self.started = 0
+        self.resumed = 0
+        self.abandoned = 0
+        self.evicted = 0
+
+    def start(
+        self, thread_id: str, user_id: Optional[str], produce: Callable[[RunBuffer], Awaitable[None]]
+    ) -> RunBuffer:
+        self._purge()
+        run = RunBuffer(thread_id, user_id)
+        self.runs[run.run_id] = run
+        run.task = asyncio.create_task(self._drive(run, produce))
+        # A callback rather than _drive's finally: a task cancelled before it first runs never enters _drive
+        run.task.add_done_callback(lambda task: self._finished(run, task))
+        self.started += 1
+        return run
+
+    async def _drive(self, run: RunBuffer, produce: Callable[[RunBuffer], Awaitable[None]]) -> None:
+        try:
+            await produce(run)
+        except asyncio.CancelledError:
+            run.publish({"type": "complete", "cancelled": True})
+        except Exception as e:
+            logger.error(f"❌ Run {run.run_id[:8]} failed: {e}", exc_info=True)
+            run.publish({"type": "error", "message": str(e)})
+
+    def _finished(self, run: RunBuffer, task: asyncio.Task) -> None:
+        if task.cancelled():
+            # Cancelled before _drive could report it
+            run.publish({"type": "complete", "cancelled": True})
+        if run.abandon_timer:
+            run.abandon_timer.cancel()
+            run.abandon_timer = None
+        run.finish()
+        self.finished[run.run_id] = None
+        asyncio.get_running_loop().call_later(settings.run_buffer_ttl_seconds, self._purge)
+
+    def get(self, run_id: str, user_id: Optional[str]) -> RunBuffer:
+        self._purge()
+        run = self.runs.get(run_id)
+        # Anonymous runs are guarded by their unguessable id alone
+        if run is None or (run.user_id and run.user_id != user_id):
+            raise RunResumeError("Unknown or expired run")
+        self.resumed += 1
+        return run
+
+    async def follow(self, run: RunBuffer, offset: int = 0) -> AsyncIterator[Tuple[int, Event]]:
+        run.followers += 1
+        if run.abandon_timer:
+            run.abandon_timer.cancel()
+            run.abandon_timer = None
+        try:
+            async for item in run.follow(offset):
+                yield item
+        finally:
+            run.followers -= 1
+            if run.followers == 0 and not run.done:
+                run.abandon_timer = asyncio.get_running_loop().call_later(
+                    settings.run_disconnect_grace_seconds, self._abandon, run
+                )
+
+    async def cancel(self, run: RunBuffer) -> None:
+        if run.task and not run.task.done():
+            run.task.cancel()
+            # wait() rather than gather(): if we're cancelled too, the run still gets to save its checkpoint
+            await asyncio.wait({run.task})
+
+    def _abandon(self, run: RunBuffer) -> None:
+        run.abandon_timer = None
+        if run.followers == 0 and run.task and not run.task.done():
+            logger.info(f"⏹️ Run {run.run_id[:8]} abandoned after disconnect")
+            self.abandoned += 1
+            run.task.cancel()
+
+    def _purge(self) -> None:
+        cutoff = time.monotonic() - settings.run_buffer_ttl_seconds
+        total = sum(run.bytes for run in self.runs.values())
+        while self.finished:
+            run_id = next(iter(self.finished))
+            run = self.runs[run_id]
+            if run.finished_at > cutoff and total <= settings.run_buffers_max_bytes:
+                break
+            if run.finished_at > cutoff:
+                self.evicted += 1
+            total -= run.bytes
+            del self.finished[run_id]
+            del self.runs[run_id]
+
+    async def close(self) -> None:
+        running = [run.task for run in self.runs.values() if run.task and not run.task.done()]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.wait(running)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "buffered_runs": len(self.runs),
+            "running": len(self.runs) - len(self.finished),
+            "buffered_bytes": sum(run.bytes for run in self.runs.values()),
+            "started": self.started,
+            "resumed": self.resumed,
+            "abandoned": self.abandoned,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,195 @@
+"""Admission control and per-thread serialization for graph runs."""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+from backend.config import settings
+from backend.utils.exceptions import RunRejectedError
+
+logger = logging.getLogger(__name__)
+
+StatusCallback = Callable[[str], Awaitable[None]]
+
+class _Waiter:
+    def __init__(self, client_id: str):
+        self.client_id = client_id
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class _ThreadLock:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+class RunScheduler:
+    """Decides when a chat turn may start.
+
+    Turns on the same thread run one at a time (``run_same_thread_policy``
+    either queues or rejects the second one), which keeps checkpoints and
+    ``is_first_message`` consistent. At most ``max_concurrent_runs`` turns
+    run at once; the rest wait in a queue of ``run_queue_size`` served
+    round-robin across clients, so one client with many tabs can't starve
+    the others. Waiting callers hear their queue position through
+    ``on_status``. Turns queued behind their own thread count toward
+    ``run_queue_size`` too, and ``run_queue_timeout`` bounds both waits
+    together.
+    """
+
+    def __init__(self):
+        self.max_running = settings.max_concurrent_runs
+        self.running = 0
+        self.waiting: Dict[str, Deque[_Waiter]] = {}
+        self.rotation: Deque[str] = deque()
+        self.thread_locks: Dict[str, _ThreadLock] = {}
+        self.thread_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        return self.thread_waiting + sum(len(waiters) for waiters in self.waiting.values())
+
+    @asynccontextmanager
+    async def run(
+        self, thread_id: str, client_id: str, on_status: Optional[StatusCallback] = None
+    ) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        async with self._thread_lock(thread_id, started, on_status):
+            await self._acquire(client_id, started, on_status)
+            try:
+                yield
+            finally:
+                self._release()
+
+    @asynccontextmanager
+    async def _thread_lock(
+        self, thread_id: str, started: float, on_status: Optional[StatusCallback]
+    ) -> AsyncIterator[None]:
+        entry = self.thread_locks.setdefault(thread_id, _ThreadLock())
+        if entry.lock.locked():
+            if settings.run_same_thread_policy == "reject":
+                self.rejected += 1
+                raise RunRejectedError("A response is already being generated in this conversation")
+            if self.queue_depth >= settings.run_queue_size:
+                self.rejected += 1
+                raise RunRejectedError("Server is busy, please try again shortly")
+            if on_status:
+                await on_status("⏳ Waiting for the previous response in this conversation...")
+        entry.users += 1
+        try:
+            self.thread_waiting += 1
+            try:
+                async with asyncio.timeout(max(0.0, started + settings.run_queue_timeout - time.perf_counter())):
+                    await entry.lock.acquire()
+            except TimeoutError:
+                self.timed_out += 1
+                raise RunRejectedError("The previous response in this conversation is taking too long") from None
+            finally:
+                self.thread_waiting -= 1
+            try:
+                yield
+            finally:
+                entry.lock.release()
+        finally:
+            entry.users -= 1
+            if entry.users == 0:
+                self.thread_locks.pop(thread_id, None)
+
+    async def _acquire(self, client_id: str, started: float, on_status: Optional[StatusCallback]) -> None:
+        if self.running < self.max_running and not self.rotation:
+            self.running += 1
+            self._admitted(started)
+            return
+        if self.queue_depth >= settings.run_queue_size:
+            self.rejected += 1
+            raise RunRejectedError("Server is busy, please try again shortly")
+
+        waiter = _Waiter(client_id)
+        if client_id not in self.waiting:
+            self.waiting[client_id] = deque()
+            self.rotation.append(client_id)
+        self.waiting[client_id].append(waiter)
+
+        reported = None
+        deadline = started + settings.run_queue_timeout
+        try:
+            while not waiter.future.done():
+                position = self._position(waiter)
+                if on_status and position != reported:
+                    reported = position
+                    await on_status(f"⏳ Queued: position {position}")
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self.timed_out += 1
+                    raise RunRejectedError("Server is busy, please try again shortly")
+                await asyncio.wait({waiter.future}, timeout=min(settings.run_status_interval, remaining))
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted while we were giving up; pass it on
+                self._release()
+            else:
+                waiter.future.cancel()
+                self._remove(waiter)
+            raise
+        self._admitted(started)
+
+    def _admitted(self, started: float) -> None:
+        waited = time.perf_counter() - started
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.recent_waits.append(waited)
+
+    def _release(self) -> None:
+        self.running -= 1
+        while self.rotation and self.running < self.max_running:
+            client_id = self.rotation.popleft()
+            waiters = self.waiting[client_id]
+            waiter = waiters.popleft()
+            if waiters:
+                self.rotation.append(client_id)
+            else:
+                del self.waiting[client_id]
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                self.running += 1
+
+    def _remove(self, waiter: _Waiter) -> None:
+        waiters = self.waiting.get(waiter.client_id)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self.waiting[waiter.client_id]
+            self.rotation.remove(waiter.client_id)
+
+    def _position(self, waiter: _Waiter) -> int:
+        """1-based place in the round-robin serving order."""
+        index = self.waiting[waiter.client_id].index(waiter)
+        turn = self.rotation.index(waiter.client_id)
+        ahead = 0
+        for position, client_id in enumerate(self.rotation):
+            queued = len(self.waiting[client_id])
+            # Every client gets ``index`` full rounds before ours, plus this round if it comes first
+            ahead += min(queued, index) + (1 if position < turn and queued > index else 0)
+        return ahead + 1
+
+    def stats(self) -> Dict[str, float]:
+        recent = sorted(self.recent_waits)
+        return {
+            "running": self.running,
+            "max_running": self.max_running,
+            "queue_depth": self.queue_depth,
+            "queued_clients": len(self.rotation),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "wait_seconds_avg": self.wait_total / self.admitted if self.admitted else 0.0,
+            "wait_seconds_p95": recent[int(len(recent) * 0.95) - 1] if recent else 0.0,
+            "wait_seconds_max": self.wait_max,
+        }
@@ -0,0 +1,122 @@
+"""TTL result cache with single-flight coalescing for tool calls."""
+import asyncio
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from cachetools import TTLCache
+from langchain_core.messages import ToolMessage
+from langchain_core.tools import BaseTool
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ToolCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors_not_cached: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+def cache_ttl(tool: BaseTool) -> float:
+    """``tool_cache_ttls[name]`` if set, else the tool's ``metadata["cache_ttl"]``; 0 means uncached."""
+    if tool.name in settings.tool_cache_ttls:
+        return settings.tool_cache_ttls[tool.name]
+    return (tool.metadata or {}).get("cache_ttl", 0)
+
+def _is_error(message: ToolMessage) -> bool:
+    if message.status == "error":
+        return True
+    # Our tools report upstream failures as {"error": ...} rather than raising
+    try:
+        content = json.loads(message.content) if isinstance(message.content, str) else None
+    except ValueError:
+        return False
+    return isinstance(content, dict) and "error" in content
+
+class ToolResultCache:
+    """Caches tool results per tool for the tool's TTL and coalesces identical calls.
+
+    Tools opt in by declaring ``cache_ttl`` in their metadata. Concurrent
+    calls with the same arguments share one upstream request, which runs in
+    its own task so a caller timing out doesn't fail the others; the task is
+    cancelled once nobody is waiting for it any more. Error results are
+    never cached.
+    """
+
+    def __init__(self):
+        self.caches: Dict[str, TTLCache] = {}
+        self.stats: Dict[str, ToolCacheStats] = {}
+        self.in_flight: Dict[Tuple[str, str], _Flight] = {}
+
+    def enabled(self, tool: BaseTool) -> bool:
+        return cache_ttl(tool) > 0
+
+    def _cache(self, tool: BaseTool) -> TTLCache:
+        cache = self.caches.get(tool.name)
+        if cache is None:
+            cache = TTLCache(maxsize=settings.tool_cache_max_entries, ttl=cache_ttl(tool))
+            self.caches[tool.name] = cache
+            self.stats[tool.name] = ToolCacheStats()
+        return cache
+
+    async def get_or_call(
+        self,
+        tool: BaseTool,
+        call: Dict[str, Any],
+        invoke: Callable[[], Awaitable[ToolMessage]]
+    ) -> ToolMessage:
+        cache = self._cache(tool)
+        stats = self.stats[tool.name]
+        key = json.dumps(call["args"], sort_keys=True, default=str)
+
+        cached: Optional[ToolMessage] = cache.get(key)
+        if cached is not None:
+            stats.hits += 1
+            return cached.model_copy(update={"tool_call_id": call["id"]})
+
+        flight = self.in_flight.get((tool.name, key))
+        if flight is None:
+            stats.misses += 1
+            flight = _Flight(asyncio.create_task(self._fill(tool, cache, key, invoke)))
+            self.in_flight[(tool.name, key)] = flight
+        else:
+            stats.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+        return result.model_copy(update={"tool_call_id": call["id"]})
+
+    async def _fill(
+        self, tool: BaseTool, cache: TTLCache, key: str, invoke: Callable[[], Awaitable[ToolMessage]]
+    ) -> ToolMessage:
+        try:
+            result = await invoke()
+            if _is_error(result):
+                self.stats[tool.name].errors_not_cached += 1
+            else:
+                cache[key] = result
+            return result
+        finally:
+            self.in_flight.pop((tool.name, key), None)
+
+    def stats_snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            name: {**asdict(stats), "hit_rate": stats.hit_rate, "entries": len(self.caches[name])}
+            for name, stats in self.stats.items()
+        }
@@ -0,0 +1,127 @@
+"""Concurrent tool execution node for the chat graph."""
+import asyncio
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence
+from langchain_core.callbacks.manager import adispatch_custom_event
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.tools import BaseTool, StructuredTool
+from backend.config import settings
+from backend.core.metrics import TOOL_DURATION, observe
+from backend.core.tool_cache import ToolResultCache
+
+logger = logging.getLogger(__name__)
+
+def is_async_tool(tool: BaseTool) -> bool:
+    if isinstance(tool, StructuredTool):
+        return tool.coroutine is not None
+    return type(tool)._arun is not BaseTool._arun
+
+def tool_error(call: Dict[str, Any], error: str, message: str, **details: Any) -> ToolMessage:
+    """A failed call as a ToolMessage the model can read and recover from."""
+    payload = {"error": error, "tool": call["name"], "message": message, **details}
+    return ToolMessage(
+        content=json.dumps(payload),
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error"
+    )
+
+class ToolExecutor:
+    """Runs every tool call of an AI message concurrently.
+
+    Each tool has its own deadline (``tool_timeouts``, else
+    ``tool_timeout_seconds``) covering both the wait for a slot and the call
+    itself, and its own semaphore (``tool_concurrency``, else
+    ``tool_max_concurrency``) shared by every conversation, so a burst of
+    users can't stampede one upstream API. Tools without a native coroutine
+    run on a dedicated thread pool instead of the loop's default executor.
+    A timeout or exception becomes an error ToolMessage; the turn goes on.
+    Tools that declare a ``cache_ttl`` are served through ``cache``.
+
+    The executor itself holds no tools: ``node`` makes a graph node over a
+    fixed tool set, so a graph keeps its tools when a newer graph is compiled
+    with different ones, while semaphores, cache and thread pool stay shared
+    by every graph of the process.
+    """
+
+    def __init__(self, cache: Optional[ToolResultCache] = None):
+        self.cache = cache or ToolResultCache()
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.thread_pool = ThreadPoolExecutor(
+            max_workers=settings.tool_thread_pool_size, thread_name_prefix="tool"
+        )
+
+    def close(self) -> None:
+        # Sync tools can't be interrupted; don't wait on ones that already timed out
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+    def node(self, tools: Sequence[BaseTool]) -> Callable[..., Awaitable[Dict[str, List[ToolMessage]]]]:
+        """The ``tools`` node of one compiled graph."""
+        by_name: Mapping[str, BaseTool] = MappingProxyType({tool.name: tool for tool in tools})
+
+        async def run_tools(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, List[ToolMessage]]:
+            message = state["messages"][-1]
+            if not isinstance(message, AIMessage) or not message.tool_calls:
+                return {"messages": []}
+            results = await asyncio.gather(*(self._run(call, config, by_name) for call in message.tool_calls))
+            return {"messages": list(results)}
+        return run_tools
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        if name not in self.semaphores:
+            self.semaphores[name] = asyncio.Semaphore(
+                settings.tool_concurrency.get(name, settings.tool_max_concurrency)
+            )
+        return self.semaphores[name]
+
+    async def _run(self, call: Dict[str, Any], config: RunnableConfig, tools: Mapping[str, BaseTool]) -> ToolMessage:
+        tool = tools.get(call["name"])
+        if tool is None:
+            return tool_error(
+                call, "unknown_tool", f"No tool named {call['name']}; available: {', '.join(tools)}"
+            )
+        timeout = settings.tool_timeouts.get(tool.name, settings.tool_timeout_seconds)
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(timeout):
+                if self.cache.enabled(tool):
+                    result = await self.cache.get_or_call(
+                        tool, call, lambda: self._invoke_limited(tool, call, config)
+                    )
+                else:
+                    result = await self._invoke_limited(tool, call, config)
+        except TimeoutError:
+            observe(TOOL_DURATION, f"tool:{tool.name}", time.perf_counter() - started, tool=tool.name, status="timeout")
+            logger.warning(f"⏱️ Tool {tool.name} timed out after {timeout}s")
+            # Cancellation skips the tool's own error callback, so tell the stream here
+            await adispatch_custom_event("tool_timeout", {"name": tool.name}, config=config)
+            return tool_error(
+                call, "timeout",
+                f"{tool.name} did not finish within {timeout:g} seconds and was cancelled.",
+                timeout_seconds=timeout
+            )
+        except Exception as e:
+            observe(TOOL_DURATION, f"tool:{tool.name}", time.perf_counter() - started, tool=tool.name, status="error")
+            logger.warning(f"Tool {tool.name} failed: {e}")
+            return tool_error(call, "tool_error", str(e), exception=type(e).__name__)
+        elapsed = time.perf_counter() - started
+        status = "error" if result.status == "error" else "ok"
+        observe(TOOL_DURATION, f"tool:{tool.name}", elapsed, tool=tool.name, status=status)
+        logger.debug(f"Tool {tool.name} finished in {elapsed:.2f}s")
+        return result
+
+    async def _invoke_limited(self, tool: BaseTool, call: Dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        async with self._semaphore(tool.name):
+            return await self._invoke(tool, call, config)
+
+    async def _invoke(self, tool: BaseTool, call: Dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        # Invoking with the full tool call makes the tool return a ready ToolMessage
+        if is_async_tool(tool):
+            return await tool.ainvoke(call, config)
+        return await run_in_executor(self.thread_pool, tool.invoke, call, config)
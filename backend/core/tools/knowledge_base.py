@@ -2,12 +2,12 @@
 from typing import Optional
 from langchain.tools import tool
 from langchain_core.documents import Document
-from backend.services.vector_service import VectorService
+from backend.services.vector_service import content_id, get_vector_service
 
 @tool
 async def search_knowledge_base(query: str) -> str:
     """📚 Knowledge Base & Document Search"""
-    vector_service = VectorService()
+    vector_service = get_vector_service()
     docs = await vector_service.search(query)
     
     if not docs:
@@ -20,8 +20,12 @@ async def search_knowledge_base(query: str) -> str:
 async def save_to_knowledge_base(content: str, metadata_category: str = "general") -> str:
     """💾 Save Information Tool"""
     try:
-        vector_service = VectorService()
-        doc = Document(page_content=content, metadata={"category": metadata_category})
+        vector_service = get_vector_service()
+        doc = Document(
+            id=content_id(content, namespace=metadata_category),
+            page_content=content,
+            metadata={"category": metadata_category}
+        )
         await vector_service.add_documents([doc])
         return "Successfully saved to knowledge base."
     except Exception as e:
@@ -1,3 +1,16 @@
 """Web search tool."""
-from langchain_community.tools import DuckDuckGoSearchRun
-search_tool = DuckDuckGoSearchRun(region="us-en")
\ No newline at end of file
+from functools import lru_cache
+from langchain.tools import tool
+
+@lru_cache(maxsize=1)
+def _duckduckgo():
+    # langchain_community is slow to import; pay for it on the first search, not at startup
+    from langchain_community.tools import DuckDuckGoSearchRun
+    return DuckDuckGoSearchRun(region="us-en")
+
+@tool("duckduckgo_search")
+def search_tool(query: str) -> str:
+    """A wrapper around DuckDuckGo Search. Useful for when you need to answer questions about current events. Input should be a search query."""
+    return _duckduckgo().invoke(query)
+
+search_tool.metadata = {"cache_ttl": 3600}
@@ -1,8 +1,8 @@
 """Stock market data tool."""
 from typing import Dict
-import httpx
 from langchain.tools import tool
 from backend.config import settings
+from backend.core.http_client import get_http_clients
 
 @tool
 async def get_stock_price(symbol: str) -> Dict:
@@ -17,9 +17,19 @@ async def get_stock_price(symbol: str) -> Dict:
     )
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.json()
+        client = get_http_clients().async_client
+        # The client's configured http_timeout applies; the tool executor enforces tool_timeouts on top
+        response = await client.get(url)
+        response.raise_for_status()
+        data = response.json()
     except Exception as e:
-        return {"error": f"Failed to fetch stock price: {str(e)}"}
\ No newline at end of file
+        return {"error": f"Failed to fetch stock price: {str(e)}"}
+    
+    if "Global Quote" not in data:
+        # Rate limiting and unknown symbols come back as 200 with a note instead of a quote
+        message = data.get("Note") or data.get("Information") or data.get("Error Message")
+        return {"error": message or "No quote returned"}
+    return data
+
+# Quotes are shared by every user asking about the same ticker
+get_stock_price.metadata = {"cache_ttl": 60}
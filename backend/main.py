@@ -3,31 +3,90 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.api.routes import chat, threads, upload
+from backend.api.routes import chat, documents, maintenance, metrics, threads, upload
 from backend.config import settings
+from backend.core.database import SQLitePool, set_db_pool
 from backend.core.graph import GraphManager
+from backend.core.http_client import HttpClientManager, set_http_clients
+from backend.core.metrics import LoopLagMonitor
+from backend.core.runs import RunRegistry
+from backend.core.scheduler import RunScheduler
+from backend.services.chat_service import ChatService
+from backend.services.document_registry import DocumentRegistry
+from backend.services.ingest_service import IngestService
+from backend.services.maintenance_service import MaintenanceService
 from backend.services.thread_service import ThreadService
+from backend.services.vector_service import VectorService, set_vector_service
 from backend.utils.logger import setup_logging
 from backend.utils.patches import apply_aiosqlite_patch
 
-setup_logging(settings.log_level)
 logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Configured here rather than on import, so importing the app has no side effects
+    setup_logging(settings.log_level)
     logger.info("🚀 Starting application...")
     apply_aiosqlite_patch()
     
-    thread_service = ThreadService()
+    loop_lag_monitor = LoopLagMonitor()
+    await loop_lag_monitor.initialize()
+    
+    http_clients = HttpClientManager()
+    await http_clients.initialize()
+    set_http_clients(http_clients)
+    app.state.http_clients = http_clients
+    
+    db_pool = SQLitePool()
+    await db_pool.initialize()
+    set_db_pool(db_pool)
+    app.state.db_pool = db_pool
+    
+    thread_service = ThreadService(db_pool)
     await thread_service.initialize_database()
     
-    graph_manager = GraphManager()
+    vector_service = VectorService(http=http_clients)
+    await vector_service.initialize()
+    set_vector_service(vector_service)
+    app.state.vector_service = vector_service
+    
+    document_registry = DocumentRegistry(db_pool)
+    await document_registry.initialize()
+    app.state.document_registry = document_registry
+    
+    ingest_service = IngestService(db_pool, vector_service, document_registry)
+    await ingest_service.initialize()
+    app.state.ingest_service = ingest_service
+    
+    graph_manager = GraphManager(db_pool)
     await graph_manager.initialize()
     app.state.graph_manager = graph_manager
+    app.state.run_scheduler = RunScheduler()
+    run_registry = RunRegistry()
+    app.state.run_registry = run_registry
+    
+    maintenance_service = MaintenanceService(db_pool, on_thread_deleted=graph_manager.invalidate_history)
+    await maintenance_service.initialize()
+    app.state.maintenance_service = maintenance_service
+    
+    chat_service = ChatService(thread_service)
+    await chat_service.initialize()
+    app.state.chat_service = chat_service
     
     yield
     
+    await run_registry.close()
+    await chat_service.close()
+    await maintenance_service.close()
+    await ingest_service.close()
     await graph_manager.cleanup()
+    set_vector_service(None)
+    await vector_service.close()
+    set_db_pool(None)
+    await db_pool.close()
+    set_http_clients(None)
+    await http_clients.close()
+    await loop_lag_monitor.close()
     logger.info("✓ Cleanup completed")
 
 app = FastAPI(title="LangGraph Chatbot API", lifespan=lifespan)
@@ -43,10 +102,22 @@ app.add_middleware(
 app.include_router(chat.router, prefix="/ws", tags=["WebSocket"])
 app.include_router(threads.router, prefix="/threads", tags=["Threads"])
 app.include_router(upload.router, tags=["Upload"])
+app.include_router(documents.router, prefix="/documents", tags=["Documents"])
+app.include_router(maintenance.router, prefix="/maintenance", tags=["Maintenance"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Metrics"])
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "db_pool": app.state.db_pool.stats(),
+        "runs": app.state.run_scheduler.stats(),
+        "streams": app.state.run_registry.stats(),
+        "tool_cache": app.state.graph_manager.tool_cache.stats_snapshot(),
+        "mcp": app.state.graph_manager.mcp_tools.stats(),
+        "http": app.state.http_clients.stats_snapshot(),
+        "vector_store": app.state.vector_service.stats(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
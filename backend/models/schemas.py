@@ -1,7 +1,7 @@
 """Pydantic models for request/response validation."""
 from datetime import datetime
 from enum import Enum
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from pydantic import BaseModel, Field, validator
 
 class MessageRole(str, Enum):
@@ -10,15 +10,22 @@ class MessageRole(str, Enum):
     SYSTEM = "system"
 
 class WebSocketMessageType(str, Enum):
+    RUN = "run"
     THREAD_ID = "thread_id"
+    THREAD_TITLE = "thread_title"
     TOKEN = "token"
     STATUS = "status"
     COMPLETE = "complete"
     ERROR = "error"
+    CANCEL = "cancel"
 
 class ChatMessageRequest(BaseModel):
     message: str = Field(..., min_length=1, max_length=10000)
-    thread_id: Optional[str] = None
+    thread_id: Optional[str] = Field(None, max_length=128)
+
+class ResumeRequest(BaseModel):
+    resume: str  # run_id from the "run" event
+    offset: int = Field(0, ge=0)  # "offset" of the last frame received
 
 class Message(BaseModel):
     role: MessageRole
@@ -32,10 +39,12 @@ class ThreadSummary(BaseModel):
 
 class ThreadListResponse(BaseModel):
     threads: List[ThreadSummary]
+    next_cursor: Optional[str] = None
     error: Optional[str] = None
 
 class ChatHistoryResponse(BaseModel):
     messages: List[Message]
+    next_cursor: Optional[int] = None
     error: Optional[str] = None
 
 class DeleteThreadResponse(BaseModel):
@@ -47,4 +56,44 @@ class FileUploadResponse(BaseModel):
     status: str
     filename: Optional[str] = None
     chunks_added: Optional[int] = None
+    job_id: Optional[str] = None
+    message: Optional[str] = None
+
+class IngestStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    filename: str
+    status: IngestStatus
+    total_chunks: Optional[int] = None
+    processed_chunks: int = 0
+    total_pages: Optional[int] = None
+    processed_pages: int = 0
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+class IndexedDocument(BaseModel):
+    source: str
+    file_hash: str
+    chunk_count: int
+    indexed_at: str
+
+class DocumentListResponse(BaseModel):
+    documents: List[IndexedDocument]
+    error: Optional[str] = None
+
+class DeleteDocumentResponse(BaseModel):
+    status: str
+    chunks_deleted: int = 0
     message: Optional[str] = None
+
+class MaintenanceStatsResponse(BaseModel):
+    database: Dict[str, int]
+    compaction: Dict[str, Any]
+    db_pool: Dict[str, float]
@@ -1,22 +1,114 @@
-"""Chat service for message handling."""
+"""Background thread-title generation."""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 from backend.config import settings
+from backend.core.llm import create_chat_model
+from backend.services.thread_service import ThreadService
+
+logger = logging.getLogger(__name__)
+
+TitleCallback = Callable[[str, str], Awaitable[None]]
+
+def fallback_title(first_message: str) -> str:
+    text = " ".join(first_message.split())
+    return text if len(text) <= 30 else text[:30] + "..."
+
+def _clean_title(title: str) -> str:
+    return title.strip().strip('"').strip()
+
+@dataclass
+class TitleRequest:
+    thread_id: str
+    first_message: str
+    on_title: Optional[TitleCallback] = None
 
 class ChatService:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model=settings.llm_model,
-            api_key=settings.openai_api_key,
-            streaming=settings.llm_streaming,
-            temperature=settings.llm_temperature
-        )
-    
-    async def generate_summary(self, first_message: str, max_words: int = 6) -> str:
+    """Names new threads in the background; one instance per app.
+
+    The chat stream never waits on a title: the thread is stored with
+    ``fallback_title`` right away and the generated title replaces it when
+    ready. Requests queue up to ``title_queue_size`` (beyond that the
+    fallback title stays), and whatever is queued when a worker wakes up is
+    titled with a single model call of up to ``title_batch_size`` messages.
+    """
+
+    def __init__(self, thread_service: ThreadService):
+        self.llm = create_chat_model(settings.title_model, temperature=0, disable_streaming=True)
+        self.thread_service = thread_service
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.title_queue_size)
+        self.workers: List[asyncio.Task] = []
+
+    async def initialize(self) -> None:
+        self.workers = [asyncio.create_task(self._worker()) for _ in range(settings.title_workers)]
+
+    async def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def request_title(self, thread_id: str, first_message: str, on_title: Optional[TitleCallback] = None) -> bool:
         try:
-            prompt = f"Generate a short title (max {max_words} words) for: {first_message}. Return ONLY the text."
+            self.queue.put_nowait(TitleRequest(thread_id, first_message, on_title))
+            return True
+        except asyncio.QueueFull:
+            logger.warning(f"Title queue full; keeping fallback title for {thread_id[:8]}")
+            return False
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < settings.title_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.warning(f"Title generation failed for {len(batch)} threads: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _process(self, batch: List[TitleRequest]) -> None:
+        titles = await self.generate_titles([request.first_message for request in batch])
+        for request, title in zip(batch, titles):
+            if not title:
+                continue
+            await self.thread_service.update_thread_summary(request.thread_id, title)
+            logger.info(f"📝 Title: '{title}'")
+            if request.on_title:
+                try:
+                    await request.on_title(request.thread_id, title)
+                except Exception:
+                    # The client went away; the stored title is what matters
+                    pass
+
+    async def generate_titles(self, first_messages: List[str]) -> List[Optional[str]]:
+        max_words = settings.title_max_words
+        if len(first_messages) == 1:
+            prompt = (
+                f"Generate a short title (max {max_words} words) for: {first_messages[0]}. "
+                "Return ONLY the text."
+            )
             response = await self.llm.ainvoke([HumanMessage(content=prompt)])
-            return response.content.strip().strip('"')
-        except Exception as e:
-            print(f"Error generating summary: {e}")
-            return first_message[:30] + "..."
\ No newline at end of file
+            return [_clean_title(response.content)]
+
+        numbered = "\n".join(f"{i + 1}. {message}" for i, message in enumerate(first_messages))
+        prompt = (
+            f"Generate a short title (max {max_words} words) for each of these {len(first_messages)} "
+            "conversation openers. Return ONLY a JSON array of strings in the same order.\n\n"
+            f"{numbered}"
+        )
+        response = await self.llm.ainvoke([HumanMessage(content=prompt)])
+        text = response.content.strip().removeprefix("```json").removeprefix("```").removesuffix("```")
+        try:
+            titles = json.loads(text)
+        except ValueError:
+            titles = None
+        if not isinstance(titles, list) or len(titles) != len(first_messages):
+            logger.warning(f"Unusable batched title response for {len(first_messages)} threads")
+            return [None] * len(first_messages)
+        return [_clean_title(str(title)) or None for title in titles]
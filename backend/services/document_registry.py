@@ -0,0 +1,133 @@
+"""Registry of indexed documents and the chunk ids they own."""
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.core.database import SQLitePool
+from backend.models.schemas import IndexedDocument
+
+def chunk_id(file_hash: str, page: int, offset: int) -> str:
+    return hashlib.sha256(f"{file_hash}:{page}:{offset}".encode("utf-8")).hexdigest()
+
+class DocumentRegistry:
+    def __init__(self, pool: SQLitePool):
+        self.pool = pool
+
+    async def initialize(self) -> None:
+        async with self.pool.acquire() as db:
+            await db.execute(
+                """CREATE TABLE IF NOT EXISTS documents (
+                    source TEXT PRIMARY KEY,
+                    file_hash TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    indexed_at TEXT NOT NULL
+                )"""
+            )
+            await db.execute(
+                """CREATE TABLE IF NOT EXISTS document_chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    content_hash TEXT NOT NULL
+                )"""
+            )
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_document_chunks_source ON document_chunks(source)"
+            )
+            await db.commit()
+
+    async def get(self, source: str) -> Optional[IndexedDocument]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT source, file_hash, chunk_count, indexed_at
+                FROM documents WHERE source = ?""",
+                (source,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return IndexedDocument(source=row[0], file_hash=row[1], chunk_count=row[2], indexed_at=row[3])
+
+    async def file_path(self, source: str) -> Optional[str]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute("SELECT file_path FROM documents WHERE source = ?", (source,))
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def file_in_use(self, file_path: str) -> bool:
+        """Uploads are stored by content hash, so several sources can share one file."""
+        async with self.pool.acquire() as db:
+            cursor = await db.execute("SELECT 1 FROM documents WHERE file_path = ? LIMIT 1", (file_path,))
+            return await cursor.fetchone() is not None
+
+    async def list_documents(self) -> List[IndexedDocument]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT source, file_hash, chunk_count, indexed_at
+                FROM documents ORDER BY indexed_at DESC"""
+            )
+            rows = await cursor.fetchall()
+        return [
+            IndexedDocument(source=row[0], file_hash=row[1], chunk_count=row[2], indexed_at=row[3])
+            for row in rows
+        ]
+
+    async def chunk_hashes(self, source: str, exclude_file_hash: str) -> Dict[str, str]:
+        """Map content hash -> chunk id for chunks of older versions of ``source``."""
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT content_hash, chunk_id FROM document_chunks
+                WHERE source = ? AND file_hash != ?""",
+                (source, exclude_file_hash)
+            )
+            return dict(await cursor.fetchall())
+
+    async def add_chunks(self, source: str, file_hash: str, chunks: Iterable[Tuple[str, str]]) -> None:
+        """Record (chunk_id, content_hash) pairs as they are committed to the vector store."""
+        async with self.pool.acquire() as db:
+            await db.executemany(
+                """INSERT OR REPLACE INTO document_chunks
+                (chunk_id, source, file_hash, content_hash) VALUES (?, ?, ?, ?)""",
+                [(cid, source, file_hash, content_hash) for cid, content_hash in chunks]
+            )
+            await db.commit()
+
+    async def finalize(self, source: str, file_hash: str, file_path: str, chunk_count: int) -> List[str]:
+        """Mark ``file_hash`` as the indexed version of ``source``; returns stale chunk ids."""
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                "SELECT chunk_id FROM document_chunks WHERE source = ? AND file_hash != ?",
+                (source, file_hash)
+            )
+            stale = [row[0] for row in await cursor.fetchall()]
+            await db.execute(
+                """INSERT OR REPLACE INTO documents
+                (source, file_hash, file_path, chunk_count, indexed_at) VALUES (?, ?, ?, ?, ?)""",
+                (source, file_hash, file_path, chunk_count, datetime.utcnow().isoformat())
+            )
+            await db.commit()
+        return stale
+
+    async def remove_chunks(self, chunk_ids: List[str]) -> None:
+        async with self.pool.acquire() as db:
+            await db.executemany(
+                "DELETE FROM document_chunks WHERE chunk_id = ?", [(cid,) for cid in chunk_ids]
+            )
+            await db.commit()
+
+    async def chunk_ids(self, source: str) -> List[str]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                "SELECT chunk_id FROM document_chunks WHERE source = ?", (source,)
+            )
+            return [row[0] for row in await cursor.fetchall()]
+
+    async def remove(self, source: str) -> Optional[str]:
+        """Forget ``source`` and its chunks; returns the stored file path."""
+        async with self.pool.acquire() as db:
+            cursor = await db.execute("SELECT file_path FROM documents WHERE source = ?", (source,))
+            row = await cursor.fetchone()
+            await db.execute("DELETE FROM document_chunks WHERE source = ?", (source,))
+            await db.execute("DELETE FROM documents WHERE source = ?", (source,))
+            await db.commit()
+        return row[0] if row else None
@@ -1,26 +1,117 @@
 """Document processing service."""
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import Executor
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from langchain_core.documents import Document
 from backend.config import settings
+from backend.services.document_registry import DocumentRegistry, chunk_id
+from backend.services.embedding_cache import normalize_text
 from backend.services.vector_service import VectorService
+from backend.utils.pdf import count_pdf_pages, split_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+# (chunks committed, pages fully committed, total pages)
+ProgressCallback = Callable[[int, int, int], Awaitable[None]]
 
 class DocumentService:
-    def __init__(self):
-        self.vector_service = VectorService()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=settings.chunk_size,
-            chunk_overlap=settings.chunk_overlap
-        )
+    def __init__(
+        self,
+        vector_service: VectorService,
+        executor: Optional[Executor] = None,
+        registry: Optional[DocumentRegistry] = None
+    ):
+        self.vector_service = vector_service
+        self.executor = executor
+        self.registry = registry
     
-    async def process_pdf(self, file_path: Path) -> int:
-        loader = PyPDFLoader(str(file_path))
-        docs = loader.load()
-        splits = self.text_splitter.split_documents(docs)
-        await self.vector_service.add_documents(splits)
-        return len(splits)
+    async def count_pages(self, file_path: Path) -> int:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, count_pdf_pages, str(file_path))
+    
+    async def iter_chunks(self, file_path: Path, total_pages: int) -> AsyncIterator[Document]:
+        """Yield split chunks window by window, parsing one window ahead."""
+        loop = asyncio.get_running_loop()
+        step = settings.ingest_pages_per_task
+        
+        def submit(start: int):
+            return loop.run_in_executor(
+                self.executor, split_pdf_pages, str(file_path),
+                start, min(start + step, total_pages),
+                settings.chunk_size, settings.chunk_overlap
+            )
+        
+        pending = submit(0) if total_pages else None
+        for start in range(0, total_pages, step):
+            splits = await pending
+            pending = submit(start + step) if start + step < total_pages else None
+            for doc in splits:
+                yield doc
+    
+    async def process_pdf(
+        self,
+        file_path: Path,
+        source: str,
+        file_hash: str,
+        on_progress: Optional[ProgressCallback] = None,
+        start_chunk: int = 0
+    ) -> int:
+        """Index ``file_path`` as the current version of ``source``.
+
+        Chunk ids are derived from (file hash, page, offset), so re-running a
+        job upserts instead of duplicating. Vectors of the previous version are
+        copied into the embedding cache first; only changed text is re-embedded.
+        """
+        total_pages = await self.count_pages(file_path)
+        previous = await self.registry.chunk_hashes(source, exclude_file_hash=file_hash)
+        if previous:
+            warmed = await self.vector_service.warm_cache(list(previous.values()))
+            logger.info(f"♻️ Reusing up to {warmed} vectors from the previous {source}")
+        committed = start_chunk
+        reused = 0
+        
+        async def chunks() -> AsyncIterator[Document]:
+            index = 0
+            async for doc in self.iter_chunks(file_path, total_pages):
+                index += 1
+                # Splitting is deterministic, so a resumed job can skip what is already stored
+                if index <= start_chunk:
+                    continue
+                doc.id = chunk_id(file_hash, doc.metadata["page"], doc.metadata["start_index"])
+                doc.metadata.update(source=source, file_hash=file_hash)
+                yield doc
+        
+        async def on_commit(batch: List[Document]) -> None:
+            nonlocal committed, reused
+            hashes = [
+                hashlib.sha256(normalize_text(doc.page_content).encode("utf-8")).hexdigest()
+                for doc in batch
+            ]
+            reused += sum(1 for h in hashes if h in previous)
+            await self.registry.add_chunks(
+                source, file_hash, [(doc.id, h) for doc, h in zip(batch, hashes)]
+            )
+            committed += len(batch)
+            if on_progress:
+                # The last page in the batch may continue into the next one
+                await on_progress(committed, batch[-1].metadata["page"], total_pages)
+        
+        await self.vector_service.add_document_stream(chunks(), on_commit=on_commit)
+        stale = await self.registry.finalize(source, file_hash, str(file_path), committed)
+        if stale:
+            await self.vector_service.delete(stale)
+            await self.registry.remove_chunks(stale)
+        if previous:
+            logger.info(
+                f"🔁 Re-indexed {source}: {committed - reused} new chunks, "
+                f"{reused} unchanged, {len(stale)} stale removed"
+            )
+        if on_progress:
+            await on_progress(committed, total_pages, total_pages)
+        return committed
     
     def validate_file(self, filename: str) -> bool:
         return any(filename.lower().endswith(ext) for ext in settings.allowed_file_types)
-
-
@@ -0,0 +1,151 @@
+"""Concurrent, rate-limited batch writer for the vector store."""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterable, Awaitable, Callable, List, Optional
+import httpx
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+BatchCallback = Callable[[List[Document]], Awaitable[None]]
+
+def _is_retryable(error: Exception) -> bool:
+    import openai  # already loaded by the embedding client whenever it can raise these
+    if isinstance(error, (
+        openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError
+    )):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
+
+class TokenBucket:
+    """Async token bucket; ``rate_per_minute <= 0`` disables limiting."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float) -> None:
+        if self.rate <= 0:
+            return
+        amount = min(amount, self.capacity)
+        # The lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+@dataclass
+class EmbeddingRunStats:
+    chunks: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+class BatchingEmbedder:
+    """Embeds and stores documents in batches with bounded parallelism.
+
+    Every batch is written to the vector store as soon as it is embedded.
+    ``on_commit`` is called in submission order, so the number of chunks it
+    has seen is always a safe point to resume from after a failure.
+    """
+
+    def __init__(self, vector_store: VectorStore, rate_limiter: Optional[TokenBucket] = None):
+        self.vector_store = vector_store
+        self.batch_size = settings.embedding_batch_size
+        self.max_in_flight = settings.embedding_max_in_flight
+        self.max_retries = settings.embedding_max_retries
+        self.rate_limiter = rate_limiter or TokenBucket(settings.embedding_tokens_per_minute)
+
+    async def add_stream(
+        self,
+        documents: AsyncIterable[Document],
+        on_commit: Optional[BatchCallback] = None
+    ) -> EmbeddingRunStats:
+        stats = EmbeddingRunStats()
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        in_flight: deque = deque()
+
+        async def drain(limit: int) -> None:
+            # Report finished batches in order; block while too many are pending
+            while in_flight and (in_flight[0][0].done() or len(in_flight) > limit):
+                task, batch = in_flight.popleft()
+                await task
+                stats.chunks += len(batch)
+                stats.batches += 1
+                if on_commit:
+                    await on_commit(batch)
+
+        async def submit(batch: List[Document]) -> None:
+            await semaphore.acquire()
+            task = asyncio.create_task(self._commit_batch(batch, semaphore, stats))
+            in_flight.append((task, batch))
+            await drain(limit=self.max_in_flight * 2)
+
+        try:
+            batch = []
+            async for doc in documents:
+                batch.append(doc)
+                if len(batch) >= self.batch_size:
+                    await submit(batch)
+                    batch = []
+            if batch:
+                await submit(batch)
+            await drain(limit=0)
+        except BaseException:
+            for task, _ in in_flight:
+                task.cancel()
+            await asyncio.gather(*(task for task, _ in in_flight), return_exceptions=True)
+            raise
+        finally:
+            stats.seconds = time.perf_counter() - started
+            if stats.chunks:
+                logger.info(
+                    f"🧮 Embedded {stats.chunks} chunks in {stats.batches} batches | "
+                    f"{stats.chunks_per_second:.1f} chunks/sec | Retries: {stats.retries}"
+                )
+        return stats
+
+    async def _commit_batch(
+        self, batch: List[Document], semaphore: asyncio.Semaphore, stats: EmbeddingRunStats
+    ) -> None:
+        try:
+            # Rough token estimate; good enough to stay under a TPM quota
+            tokens = sum(len(doc.page_content) for doc in batch) // 4 + 1
+            for attempt in range(self.max_retries + 1):
+                await self.rate_limiter.acquire(tokens)
+                try:
+                    await self.vector_store.aadd_documents(batch)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries or not _is_retryable(e):
+                        raise
+                    delay = min(
+                        settings.embedding_backoff_base * 2 ** attempt,
+                        settings.embedding_backoff_max
+                    ) * random.uniform(0.5, 1.0)
+                    stats.retries += 1
+                    logger.warning(f"Embedding batch failed ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+        finally:
+            semaphore.release()
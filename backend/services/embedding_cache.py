@@ -0,0 +1,217 @@
+"""Content-addressed embedding cache for the vector store."""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+from cachetools import LRUCache
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+class EmbeddingCache:
+    """SQLite-backed vector cache with a bounded in-memory LRU in front.
+
+    Entries are keyed by (embedding model, sha256 of the normalized text) and
+    evicted least-recently-used first once the file exceeds ``max_disk_bytes``.
+    """
+
+    def __init__(self, path: str, model: str, max_memory_items: int, max_disk_bytes: int):
+        self.path = Path(path)
+        self.model = model
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = LRUCache(maxsize=max_memory_items)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def initialize(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        self._disk_bytes = row[0]
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+        logger.info(f"Embedding cache closed | {self.stats()}")
+
+    def key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\x00{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up already-normalized texts; returns None for misses."""
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = self.key(text)
+                vector = self.memory.get(key)
+                if vector is not None:
+                    self.memory_hits += 1
+                    results[i] = vector.tolist()
+                else:
+                    pending.setdefault(key, []).append(i)
+            if not pending or self._conn is None:
+                self.misses += sum(len(v) for v in pending.values())
+                return results
+
+            keys = list(pending)
+            found = {}
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+            for key, indexes in pending.items():
+                blob = found.get(key)
+                if blob is None:
+                    self.misses += len(indexes)
+                    continue
+                vector = array("f")
+                vector.frombytes(blob)
+                self.memory[key] = vector
+                self.disk_hits += len(indexes)
+                for i in indexes:
+                    results[i] = vector.tolist()
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]) -> None:
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, values in zip(texts, vectors):
+                key = self.key(text)
+                vector = array("f", values)
+                self.memory[key] = vector
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+            if self._conn is None or not rows:
+                return
+            # A key already on disk holds the same vector (same model, same text); count only new rows
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)", row
+                )
+                if cursor.rowcount:
+                    self._disk_bytes += row[2]
+            self._conn.commit()
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Trim to 90% so we don't evict again on the very next insert
+        target = int(self.max_disk_bytes * 0.9)
+        cursor = self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_access ASC")
+        doomed = []
+        while self._disk_bytes > target:
+            row = cursor.fetchone()
+            if row is None:
+                break
+            doomed.append((row[0],))
+            self._disk_bytes -= row[1]
+        cursor.close()
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self._conn.commit()
+        self.evictions += len(doomed)
+        logger.info(f"Evicted {len(doomed)} cached embeddings")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_items": len(self.memory),
+            "disk_bytes": self._disk_bytes,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the underlying model."""
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache):
+        self.underlying = underlying
+        self.cache = cache
+
+    def _split(self, texts: List[str]):
+        normalized = [normalize_text(t) for t in texts]
+        cached = self.cache.get_many(normalized)
+        missing = list(dict.fromkeys(
+            text for text, vector in zip(normalized, cached) if vector is None
+        ))
+        return normalized, cached, missing
+
+    @staticmethod
+    def _merge(normalized, cached, missing, vectors) -> List[List[float]]:
+        computed = dict(zip(missing, vectors))
+        return [vector if vector is not None else computed[text]
+                for text, vector in zip(normalized, cached)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        normalized, cached, missing = self._split(texts)
+        vectors = self.underlying.embed_documents(missing) if missing else []
+        if missing:
+            self.cache.put_many(missing, vectors)
+        return self._merge(normalized, cached, missing, vectors)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        normalized, cached, missing = await asyncio.to_thread(self._split, texts)
+        vectors = await self.underlying.aembed_documents(missing) if missing else []
+        if missing:
+            await asyncio.to_thread(self.cache.put_many, missing, vectors)
+        return self._merge(normalized, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        normalized = normalize_text(text)
+        vector = self.cache.get_many([normalized])[0]
+        if vector is None:
+            vector = self.underlying.embed_query(normalized)
+            self.cache.put_many([normalized], [vector])
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        normalized = normalize_text(text)
+        vector = (await asyncio.to_thread(self.cache.get_many, [normalized]))[0]
+        if vector is None:
+            vector = await self.underlying.aembed_query(normalized)
+            await asyncio.to_thread(self.cache.put_many, [normalized], [vector])
+        return vector
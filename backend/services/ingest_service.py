@@ -0,0 +1,215 @@
+"""Background ingestion queue for uploaded documents."""
+import asyncio
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+import anyio
+from backend.config import settings
+from backend.core.database import SQLitePool
+from backend.models.schemas import IngestJobResponse, IngestStatus
+from backend.services.document_registry import DocumentRegistry
+from backend.services.document_service import DocumentService
+from backend.services.vector_service import VectorService
+
+logger = logging.getLogger(__name__)
+
+class IngestService:
+    """Persists ingest jobs in SQLite and works them off in the background.
+
+    PDF parsing and splitting run in a process pool so they never block the
+    event loop; embedding happens in batches with progress written per batch.
+    Jobs left queued or half-done by a restart are picked up again on startup.
+    Uploads are stored under their content hash, so a job always reads the
+    file it was submitted with; a stored file is deleted once no indexed
+    document or pending job refers to it.
+    """
+
+    def __init__(self, pool: SQLitePool, vector_service: VectorService, registry: DocumentRegistry):
+        self.pool = pool
+        self.vector_service = vector_service
+        self.registry = registry
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.document_service: Optional[DocumentService] = None
+        self.workers: List[asyncio.Task] = []
+        self._submit_lock = asyncio.Lock()
+
+    async def initialize(self) -> None:
+        async with self.pool.acquire() as db:
+            await db.execute(
+                """CREATE TABLE IF NOT EXISTS ingest_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    total_chunks INTEGER,
+                    processed_chunks INTEGER NOT NULL DEFAULT 0,
+                    total_pages INTEGER,
+                    processed_pages INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )"""
+            )
+            await db.commit()
+            cursor = await db.execute(
+                "SELECT job_id FROM ingest_jobs WHERE status IN (?, ?) ORDER BY created_at",
+                (IngestStatus.QUEUED.value, IngestStatus.PROCESSING.value)
+            )
+            pending = [row[0] for row in await cursor.fetchall()]
+
+        # Spawn rather than fork: the parent already runs threads (Chroma, aiosqlite)
+        self.executor = ProcessPoolExecutor(
+            max_workers=settings.ingest_process_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self.document_service = DocumentService(self.vector_service, self.executor, self.registry)
+        for job_id in pending:
+            self.queue.put_nowait(job_id)
+        self.workers = [
+            asyncio.create_task(self._worker(), name=f"ingest-worker-{i}")
+            for i in range(settings.ingest_workers)
+        ]
+        if pending:
+            logger.info(f"Resuming {len(pending)} ingest jobs")
+
+    async def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def submit(self, filename: str, file_path: Path, file_hash: str) -> Tuple[str, bool]:
+        """Queue an ingest; returns the job id and False if the same file was already pending."""
+        async with self._submit_lock:
+            existing = await self._pending_job(filename, file_hash)
+            if existing:
+                logger.info(f"📥 {filename} is already queued as {existing[:8]}")
+                return existing, False
+            job_id = await self._insert_job(filename, file_path, file_hash)
+        await self.queue.put(job_id)
+        logger.info(f"📥 Queued ingest {job_id[:8]} for {filename}")
+        return job_id, True
+
+    async def _pending_job(self, filename: str, file_hash: str) -> Optional[str]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT job_id FROM ingest_jobs
+                WHERE filename = ? AND file_hash = ? AND status IN (?, ?)
+                ORDER BY created_at LIMIT 1""",
+                (filename, file_hash, IngestStatus.QUEUED.value, IngestStatus.PROCESSING.value)
+            )
+            row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def release_file(self, file_path: str) -> None:
+        """Delete a stored upload once no indexed document or pending job refers to it."""
+        if await self.registry.file_in_use(file_path):
+            return
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                "SELECT 1 FROM ingest_jobs WHERE file_path = ? AND status IN (?, ?) LIMIT 1",
+                (file_path, IngestStatus.QUEUED.value, IngestStatus.PROCESSING.value)
+            )
+            if await cursor.fetchone():
+                return
+        await anyio.Path(file_path).unlink(missing_ok=True)
+
+    async def _insert_job(self, filename: str, file_path: Path, file_hash: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = datetime.utcnow().isoformat()
+        async with self.pool.acquire() as db:
+            await db.execute(
+                """INSERT INTO ingest_jobs
+                (job_id, filename, file_path, file_hash, status, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (job_id, filename, str(file_path.resolve()), file_hash,
+                 IngestStatus.QUEUED.value, now, now)
+            )
+            await db.commit()
+        return job_id
+
+    async def get_job(self, job_id: str) -> Optional[IngestJobResponse]:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT job_id, filename, status, total_chunks, processed_chunks,
+                total_pages, processed_pages, error, created_at, updated_at
+                FROM ingest_jobs WHERE job_id = ?""",
+                (job_id,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        total_pages, processed_pages = row[5], row[6]
+        if row[2] == IngestStatus.COMPLETED.value:
+            progress = 1.0
+        else:
+            # Chunk totals are only known at the end of a streamed ingest, pages up front
+            progress = processed_pages / total_pages if total_pages else 0.0
+        return IngestJobResponse(
+            job_id=row[0], filename=row[1], status=row[2], total_chunks=row[3],
+            processed_chunks=row[4], total_pages=total_pages, processed_pages=processed_pages,
+            progress=progress, error=row[7], created_at=row[8], updated_at=row[9]
+        )
+
+    async def _update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        async with self.pool.acquire() as db:
+            await db.execute(
+                f"UPDATE ingest_jobs SET {assignments} WHERE job_id = ?",
+                (*fields.values(), job_id)
+            )
+            await db.commit()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self.queue.get()
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ingest {job_id[:8]} failed: {e}", exc_info=True)
+                await self._update(job_id, status=IngestStatus.FAILED.value, error=str(e))
+            finally:
+                self.queue.task_done()
+
+    async def _run_job(self, job_id: str) -> None:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT filename, file_path, file_hash, processed_chunks
+                FROM ingest_jobs WHERE job_id = ?""",
+                (job_id,)
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return
+        filename, file_path, file_hash, processed = row[0], Path(row[1]), row[2], row[3]
+        await self._update(job_id, status=IngestStatus.PROCESSING.value)
+        previous_path = await self.registry.file_path(filename)
+
+        async def on_progress(chunks: int, pages: int, total_pages: int) -> None:
+            await self._update(
+                job_id, processed_chunks=chunks, processed_pages=pages, total_pages=total_pages
+            )
+
+        total = await self.document_service.process_pdf(
+            file_path, source=filename, file_hash=file_hash,
+            on_progress=on_progress, start_chunk=processed
+        )
+        await self._update(
+            job_id, status=IngestStatus.COMPLETED.value,
+            total_chunks=total, processed_chunks=total
+        )
+        if previous_path and previous_path != str(file_path):
+            await self.release_file(previous_path)
+        logger.info(f"✅ Ingest {job_id[:8]} complete | Chunks: {total}")
@@ -0,0 +1,121 @@
+"""SQLite FTS5 keyword index kept alongside the Chroma collection."""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from langchain_core.documents import Document
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def reciprocal_rank_fusion(
+    result_lists: Sequence[Sequence[Document]], k: int, rrf_k: int = 60
+) -> List[Document]:
+    """Merge ranked lists by summing 1 / (rrf_k + rank) per document."""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
+
+class LexicalIndex:
+    """BM25 search over chunk text, keyed by the same ids as the vector store."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def initialize(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                content, content='chunks', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content)
+                VALUES ('delete', old.rowid, old.content);
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.rowid, new.content);
+            END;
+            """
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def upsert(self, documents: Sequence[Document]) -> None:
+        rows = [
+            (doc.id, doc.page_content, json.dumps(doc.metadata, default=str))
+            for doc in documents
+        ]
+        with self._lock:
+            self._conn.executemany(
+                """INSERT INTO chunks (doc_id, content, metadata) VALUES (?, ?, ?)
+                ON CONFLICT(doc_id) DO UPDATE SET
+                    content = excluded.content, metadata = excluded.metadata""",
+                rows
+            )
+            self._conn.commit()
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE doc_id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def search(self, query: str, k: int, min_relative_score: float = 0.0) -> List[Document]:
+        """BM25 top-k; hits scoring below ``min_relative_score`` x the best hit are dropped.
+
+        The cutoff removes the long tail of chunks that only share a common word
+        with the query, which would otherwise crowd out a lone exact match once
+        fused with the dense results.
+        """
+        # Quote every term so identifiers like ERR-42 or a.b.c can't be parsed as FTS syntax
+        terms = _TOKEN_RE.findall(query)
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT c.doc_id, c.content, c.metadata, bm25(chunks_fts) AS score
+                FROM chunks_fts JOIN chunks c ON c.rowid = chunks_fts.rowid
+                WHERE chunks_fts MATCH ? ORDER BY score LIMIT ?""",
+                (match, k)
+            ).fetchall()
+        if not rows:
+            return []
+        # bm25() is negative; more negative is a better match
+        best = rows[0][3]
+        return [
+            Document(id=row[0], page_content=row[1], metadata=json.loads(row[2]))
+            for row in rows
+            if best == 0 or row[3] / best >= min_relative_score
+        ]
@@ -0,0 +1,230 @@
+"""Background compaction of the LangGraph checkpoint tables."""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from backend.config import settings
+from backend.core.database import SQLitePool
+from backend.services.thread_service import ThreadService
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+@dataclass
+class CompactionStats:
+    runs: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    threads_expired: int = 0
+    pages_reclaimed: int = 0
+    last_run_at: Optional[str] = None
+    last_run_seconds: float = 0.0
+    last_error: Optional[str] = None
+
+class MaintenanceService:
+    """Keeps ``chatbot.db`` from growing without bound.
+
+    The checkpointer writes a checkpoint for every graph step and never
+    prunes them. Each run keeps the newest ``checkpoint_keep_last``
+    checkpoints per thread, drops writes whose checkpoint is gone, deletes
+    threads idle for longer than ``thread_ttl_days`` and hands the freed
+    pages back to the filesystem with an incremental VACUUM. Deletes run in
+    small batches so the checkpointer is never locked out for long.
+
+    A database created before incremental auto_vacuum was enabled needs one
+    full VACUUM to switch over. That runs once in the background task rather
+    than at startup; it holds the write lock for as long as it takes, so on a
+    large ``chatbot.db`` prefer running it offline (``sqlite3 chatbot.db
+    "PRAGMA auto_vacuum=2; VACUUM;"``) before upgrading.
+    """
+
+    def __init__(self, pool: SQLitePool, on_thread_deleted: Optional[Callable[[str], None]] = None):
+        self.pool = pool
+        self.on_thread_deleted = on_thread_deleted
+        self.thread_service = ThreadService(pool)
+        self.stats = CompactionStats()
+        self.task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def initialize(self) -> None:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute("PRAGMA auto_vacuum")
+            mode = (await cursor.fetchone())[0]
+        needs_vacuum = mode != AUTO_VACUUM_INCREMENTAL
+        if needs_vacuum or settings.compaction_interval_seconds > 0:
+            self.task = asyncio.create_task(self._run_forever(needs_vacuum))
+
+    async def close(self) -> None:
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def _enable_incremental_vacuum(self) -> None:
+        async with self._lock, self.pool.acquire() as db:
+            # Switching an existing database needs one full VACUUM to take effect
+            logger.info("🧹 Enabling incremental auto_vacuum (one-time VACUUM)...")
+            started = time.perf_counter()
+            await db.execute(f"PRAGMA auto_vacuum={AUTO_VACUUM_INCREMENTAL}")
+            await db.execute("VACUUM")
+            logger.info(f"✓ Incremental auto_vacuum enabled in {time.perf_counter() - started:.2f}s")
+
+    async def _run_forever(self, needs_vacuum: bool) -> None:
+        if needs_vacuum:
+            try:
+                await self._enable_incremental_vacuum()
+            except Exception as e:
+                self.stats.last_error = str(e)
+                logger.error(f"Enabling incremental auto_vacuum failed: {e}", exc_info=True)
+        if settings.compaction_interval_seconds <= 0:
+            return
+        while True:
+            await asyncio.sleep(settings.compaction_interval_seconds)
+            try:
+                await self.compact()
+            except Exception as e:
+                self.stats.last_error = str(e)
+                logger.error(f"Checkpoint compaction failed: {e}", exc_info=True)
+
+    async def compact(self) -> CompactionStats:
+        async with self._lock:
+            started = time.perf_counter()
+            expired = await self._expire_idle_threads()
+            checkpoints = await self._prune_checkpoints()
+            writes = await self._delete_orphaned_writes()
+            pages = await self._incremental_vacuum()
+
+            self.stats.runs += 1
+            self.stats.threads_expired += expired
+            self.stats.checkpoints_deleted += checkpoints
+            self.stats.writes_deleted += writes
+            self.stats.pages_reclaimed += pages
+            self.stats.last_run_at = datetime.utcnow().isoformat()
+            self.stats.last_run_seconds = time.perf_counter() - started
+            self.stats.last_error = None
+            logger.info(
+                f"🧹 Compaction: {checkpoints} checkpoints, {writes} writes, "
+                f"{expired} idle threads, {pages} pages reclaimed "
+                f"in {self.stats.last_run_seconds:.2f}s"
+            )
+            return self.stats
+
+    async def _delete_rowids(self, table: str, rowids: List[int]) -> int:
+        deleted = 0
+        for start in range(0, len(rowids), settings.compaction_batch_size):
+            batch = rowids[start:start + settings.compaction_batch_size]
+            async with self.pool.acquire() as db:
+                cursor = await db.execute(
+                    f"DELETE FROM {table} WHERE rowid IN ({','.join('?' * len(batch))})", batch
+                )
+                await db.commit()
+                deleted += cursor.rowcount
+            # Let the checkpointer in between batches
+            await asyncio.sleep(0)
+        return deleted
+
+    async def _delete_in_batches(self, query: str, params: tuple = ()) -> int:
+        """Run a ``DELETE ... WHERE rowid IN (... LIMIT ?)`` until nothing is left."""
+        batch_size = settings.compaction_batch_size
+        deleted = 0
+        while True:
+            async with self.pool.acquire() as db:
+                cursor = await db.execute(query, params + (batch_size,))
+                await db.commit()
+                count = cursor.rowcount
+            deleted += count
+            if count < batch_size:
+                return deleted
+            # Let the checkpointer in between batches
+            await asyncio.sleep(0)
+
+    async def _prune_checkpoints(self) -> int:
+        keep = settings.checkpoint_keep_last
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(
+                """SELECT thread_id, checkpoint_ns FROM checkpoints
+                GROUP BY thread_id, checkpoint_ns HAVING COUNT(*) > ?""",
+                (keep,)
+            )
+            groups = await cursor.fetchall()
+        deleted = 0
+        for thread_id, checkpoint_ns in groups:
+            # One primary-key range read per thread; checkpoint ids are time-ordered
+            # (uuid6), and anything written meanwhile is newer than what we picked
+            async with self.pool.acquire() as db:
+                cursor = await db.execute(
+                    """SELECT rowid FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                    ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?""",
+                    (thread_id, checkpoint_ns, keep)
+                )
+                rowids = [row[0] for row in await cursor.fetchall()]
+            deleted += await self._delete_rowids("checkpoints", rowids)
+        return deleted
+
+    async def _delete_orphaned_writes(self) -> int:
+        return await self._delete_in_batches(
+            """DELETE FROM writes WHERE rowid IN (
+                SELECT w.rowid FROM writes w WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = w.thread_id
+                    AND c.checkpoint_ns = w.checkpoint_ns
+                    AND c.checkpoint_id = w.checkpoint_id
+                ) LIMIT ?
+            )"""
+        )
+
+    async def _expire_idle_threads(self) -> int:
+        if settings.thread_ttl_days <= 0:
+            return 0
+        cutoff = (datetime.utcnow() - timedelta(days=settings.thread_ttl_days)).isoformat()
+        thread_ids = await self.thread_service.get_idle_threads(cutoff)
+        for thread_id in thread_ids:
+            await self.thread_service.delete_thread(thread_id)
+            if self.on_thread_deleted:
+                self.on_thread_deleted(thread_id)
+        return len(thread_ids)
+
+    async def _incremental_vacuum(self) -> int:
+        async with self.pool.acquire() as db:
+            cursor = await db.execute("PRAGMA freelist_count")
+            before = (await cursor.fetchone())[0]
+            # The pragma frees one page per step and execute() only steps once;
+            # executescript() runs it to completion
+            await db.executescript(f"PRAGMA incremental_vacuum({settings.compaction_vacuum_pages});")
+            cursor = await db.execute("PRAGMA freelist_count")
+            after = (await cursor.fetchone())[0]
+            # Fold the WAL back in so the shrunken file size is visible on disk
+            await db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return before - after
+
+    async def database_stats(self) -> Dict[str, int]:
+        async with self.pool.acquire() as db:
+            counts: List[int] = []
+            for query in (
+                "PRAGMA page_count",
+                "PRAGMA page_size",
+                "PRAGMA freelist_count",
+                "SELECT COUNT(*) FROM checkpoints",
+                "SELECT COUNT(*) FROM writes",
+                "SELECT COUNT(DISTINCT thread_id) FROM checkpoints",
+            ):
+                cursor = await db.execute(query)
+                counts.append((await cursor.fetchone())[0])
+        page_count, page_size, freelist, checkpoints, writes, threads = counts
+        wal_path = f"{self.pool.db_path}-wal"
+        return {
+            "db_size_bytes": page_count * page_size,
+            "file_size_bytes": os.path.getsize(self.pool.db_path),
+            "wal_size_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            "free_bytes": freelist * page_size,
+            "checkpoints": checkpoints,
+            "writes": writes,
+            "threads": threads,
+        }
+
+    def compaction_stats(self) -> Dict:
+        return asdict(self.stats)
@@ -1,38 +1,107 @@
-from typing import List, Optional
-import aiosqlite
+import base64
+import json
+from typing import List, Optional, Tuple
 from datetime import datetime
-from backend.config import settings
+from backend.core.database import SQLitePool, get_db_pool
+from backend.core.metrics import THREAD_DB_DURATION, timed_method
 from backend.models.schemas import ThreadSummary
+from backend.utils.exceptions import DatabaseError
+
+def encode_cursor(created_at: str, thread_id: str) -> str:
+    raw = json.dumps([created_at, thread_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, thread_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(created_at), str(thread_id)
+    except Exception as e:
+        raise DatabaseError("Invalid thread cursor", details=str(e))
 
 class ThreadService:
-    def __init__(self):
-        self.db_path = settings.db_path
+    def __init__(self, pool: Optional[SQLitePool] = None):
+        self.pool = pool or get_db_pool()
     
-    async def create_thread_summary(self, thread_id: str, summary: str) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
+    @timed_method(THREAD_DB_DURATION, "thread_db")
+    async def create_thread_summary(self, thread_id: str, summary: str, user_id: str = "") -> None:
+        async with self.pool.acquire() as db:
+            now = datetime.utcnow().isoformat()
             await db.execute(
                 """INSERT OR REPLACE INTO thread_summaries 
-                (thread_id, summary, created_at) VALUES (?, ?, ?)""",
-                (thread_id, summary, datetime.utcnow().isoformat())
+                (thread_id, summary, created_at, user_id, updated_at) VALUES (?, ?, ?, ?, ?)""",
+                (thread_id, summary, now, user_id, now)
+            )
+            await db.commit()
+    
+    @timed_method(THREAD_DB_DURATION, "thread_db")
+    async def update_thread_summary(self, thread_id: str, summary: str) -> None:
+        async with self.pool.acquire() as db:
+            await db.execute(
+                "UPDATE thread_summaries SET summary = ? WHERE thread_id = ?", (summary, thread_id)
+            )
+            await db.commit()
+    
+    @timed_method(THREAD_DB_DURATION, "thread_db")
+    async def touch_thread(self, thread_id: str) -> None:
+        """Record activity on a thread so retention doesn't expire it."""
+        async with self.pool.acquire() as db:
+            await db.execute(
+                "UPDATE thread_summaries SET updated_at = ? WHERE thread_id = ?",
+                (datetime.utcnow().isoformat(), thread_id)
             )
             await db.commit()
     
-    async def get_all_threads(self) -> List[ThreadSummary]:
-        async with aiosqlite.connect(self.db_path) as db:
+    @timed_method(THREAD_DB_DURATION, "thread_db")
+    async def get_idle_threads(self, cutoff: str) -> List[str]:
+        async with self.pool.acquire() as db:
             cursor = await db.execute(
-                """SELECT thread_id, summary, created_at
-                FROM thread_summaries ORDER BY created_at DESC"""
+                "SELECT thread_id FROM thread_summaries WHERE COALESCE(updated_at, created_at) < ?",
+                (cutoff,)
             )
+            return [row[0] for row in await cursor.fetchall()]
+    
+    @timed_method(THREAD_DB_DURATION, "thread_db")
+    async def get_threads(
+        self, user_id: str = "", limit: int = 50, before: Optional[str] = None
+    ) -> Tuple[List[ThreadSummary], Optional[str]]:
+        """One page of a user's threads, newest first.
+
+        Keyset pagination on (created_at, thread_id) walks the
+        idx_thread_summaries_user_created index, so every page costs O(limit)
+        no matter how deep it is. Returns the page and the cursor for the next one.
+        """
+        if before:
+            created_at, thread_id = decode_cursor(before)
+            query = """SELECT thread_id, summary, created_at FROM thread_summaries
+                WHERE user_id = ? AND (created_at, thread_id) < (?, ?)
+                ORDER BY created_at DESC, thread_id DESC LIMIT ?"""
+            params = (user_id, created_at, thread_id, limit + 1)
+        else:
+            query = """SELECT thread_id, summary, created_at FROM thread_summaries
+                WHERE user_id = ?
+                ORDER BY created_at DESC, thread_id DESC LIMIT ?"""
+            params = (user_id, limit + 1)
+        
+        async with self.pool.acquire() as db:
+            cursor = await db.execute(query, params)
             rows = await cursor.fetchall()
-            return [
-                ThreadSummary(thread_id=row[0], summary=row[1], created_at=row[2])
-                for row in rows
-            ]
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][2], rows[-1][0])
+        threads = [
+            ThreadSummary(thread_id=row[0], summary=row[1], created_at=row[2])
+            for row in rows
+        ]
+        return threads, next_cursor
     
+    @timed_method(THREAD_DB_DURATION, "thread_db")
     async def delete_thread(self, thread_id: str) -> bool:
         try:
-            async with aiosqlite.connect(self.db_path) as db:
+            async with self.pool.acquire() as db:
                 await db.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                await db.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
                 await db.execute("DELETE FROM thread_summaries WHERE thread_id = ?", (thread_id,))
                 await db.commit()
                 return True
@@ -40,12 +109,31 @@ class ThreadService:
             return False
     
     async def initialize_database(self) -> None:
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self.pool.acquire() as db:
             await db.execute(
                 """CREATE TABLE IF NOT EXISTS thread_summaries (
                     thread_id TEXT PRIMARY KEY,
                     summary TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    user_id TEXT NOT NULL DEFAULT '',
+                    updated_at TEXT
                 )"""
             )
+            cursor = await db.execute("PRAGMA table_info(thread_summaries)")
+            columns = {row[1] for row in await cursor.fetchall()}
+            if "user_id" not in columns:
+                await db.execute(
+                    "ALTER TABLE thread_summaries ADD COLUMN user_id TEXT NOT NULL DEFAULT ''"
+                )
+            if "updated_at" not in columns:
+                await db.execute("ALTER TABLE thread_summaries ADD COLUMN updated_at TEXT")
+            # Activity before updated_at existed is unknown; start the idle clock now rather than at created_at
+            await db.execute(
+                "UPDATE thread_summaries SET updated_at = ? WHERE updated_at IS NULL",
+                (datetime.utcnow().isoformat(),)
+            )
+            await db.execute(
+                """CREATE INDEX IF NOT EXISTS idx_thread_summaries_user_created
+                ON thread_summaries(user_id, created_at DESC, thread_id DESC)"""
+            )
             await db.commit()
@@ -1,25 +1,225 @@
 """Vector store service for document management."""
-from typing import List, Optional
-from langchain_chroma import Chroma
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, AsyncIterable, Dict, List, Optional
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
+from langchain_core.embeddings import Embeddings
 from backend.config import settings
+from backend.core.http_client import HttpClientManager
+from backend.core.llm import create_embeddings, embedding_model_name
+from backend.core.metrics import RETRIEVAL_DURATION, timed
+from backend.services.embedding_batcher import BatchCallback, BatchingEmbedder, EmbeddingRunStats
+from backend.services.embedding_cache import CachedEmbeddings, EmbeddingCache, normalize_text
+from backend.services.lexical_index import LexicalIndex, reciprocal_rank_fusion
+from backend.utils.exceptions import VectorStoreError
+
+logger = logging.getLogger(__name__)
+
+def content_id(text: str, namespace: str = "") -> str:
+    """Stable id for free-standing content so identical saves upsert instead of duplicating."""
+    return hashlib.sha256(f"{namespace}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
 
 class VectorService:
-    def __init__(self):
-        self.embeddings = OpenAIEmbeddings(
-            model=settings.embedding_model,
-            openai_api_key=settings.openai_api_key
-        )
-        self.vector_store = Chroma(
-            collection_name=settings.vector_collection_name,
-            embedding_function=self.embeddings,
-            persist_directory=settings.vector_db_path
-        )
-    
+    """Process-wide vector store; created once in the app lifespan.
+
+    Chroma is imported and opened on a worker thread in the background, so
+    startup doesn't wait for it; the first call that needs it does.
+    """
+
+    def __init__(self, embeddings: Optional[Embeddings] = None, http: Optional[HttpClientManager] = None):
+        self.client = None
+        self.embeddings = embeddings
+        self.embedding_cache = None
+        self.vector_store = None
+        self.embedder = None
+        self.lexical_index = None
+        self.http = http
+        self._owns_http = http is None
+        self._backfill_task = None
+        self._opening: Optional[asyncio.Task] = None
+        self.open_seconds: Optional[float] = None
+
+    async def initialize(self) -> None:
+        if self.embeddings is None:
+            if self.http is None:
+                self.http = HttpClientManager()
+                await self.http.initialize()
+            self.embeddings = create_embeddings(self.http)
+        if settings.embedding_cache_enabled:
+            self.embedding_cache = EmbeddingCache(
+                settings.embedding_cache_path,
+                model=embedding_model_name(),
+                max_memory_items=settings.embedding_cache_memory_items,
+                max_disk_bytes=settings.embedding_cache_max_bytes
+            )
+            await asyncio.to_thread(self.embedding_cache.initialize)
+            self.embeddings = CachedEmbeddings(self.embeddings, self.embedding_cache)
+        self._opening = asyncio.create_task(self._open_store())
+        if settings.hybrid_search_enabled:
+            self.lexical_index = LexicalIndex(settings.lexical_index_path)
+            await asyncio.to_thread(self.lexical_index.initialize)
+            self._backfill_task = asyncio.create_task(self._backfill_lexical_index())
+
+    async def _open_store(self) -> None:
+        def open_store():
+            # Importing chromadb costs about as much as opening it; both stay off the event loop
+            import chromadb
+            from langchain_chroma import Chroma
+            # Opening the persistent client touches SQLite and the HNSW segments on disk
+            client = chromadb.PersistentClient(path=settings.vector_db_path)
+            store = Chroma(
+                collection_name=settings.vector_collection_name,
+                embedding_function=self.embeddings,
+                client=client
+            )
+            return client, store
+
+        started = time.perf_counter()
+        self.client, self.vector_store = await asyncio.to_thread(open_store)
+        self.embedder = BatchingEmbedder(self.vector_store)
+        self.open_seconds = time.perf_counter() - started
+        logger.info(f"✓ Vector store ready: {settings.vector_collection_name} ({self.open_seconds:.2f}s)")
+
+    async def ready(self) -> None:
+        """Wait until Chroma is open; re-raises if opening it failed."""
+        if self._opening is None:
+            raise VectorStoreError("Vector service is not initialized")
+        # Shielded: a cancelled caller must not abort the open for everyone else
+        await asyncio.shield(self._opening)
+
+    def stats(self) -> Dict[str, Any]:
+        if self._opening is None or not self._opening.done():
+            state = "opening" if self._opening else "closed"
+        else:
+            state = "failed" if self._opening.cancelled() or self._opening.exception() else "ready"
+        return {"state": state, "open_seconds": self.open_seconds}
+
+    async def close(self) -> None:
+        if self._opening:
+            # A worker thread can't be interrupted; let the open finish so the client gets closed
+            await asyncio.gather(self._opening, return_exceptions=True)
+        if self._backfill_task:
+            self._backfill_task.cancel()
+            await asyncio.gather(self._backfill_task, return_exceptions=True)
+        if self.lexical_index:
+            self.lexical_index.close()
+        if self.http and self._owns_http:
+            await self.http.close()
+        if self.embedding_cache:
+            self.embedding_cache.close()
+        if self.client:
+            self.client.clear_system_cache()
+        self.vector_store = None
+        self.client = None
+
     async def search(self, query: str, k: Optional[int] = None) -> List[Document]:
+        """Hybrid search: dense and BM25 candidates merged with reciprocal rank fusion."""
         k = k or settings.vector_search_k
-        return await self.vector_store.asimilarity_search(query, k=k)
-    
-    async def add_documents(self, documents: List[Document]) -> None:
-        await self.vector_store.aadd_documents(documents)
\ No newline at end of file
+        if not self.lexical_index:
+            return await self.dense_search(query, k)
+        candidates = max(k, settings.hybrid_candidate_k)
+        started = time.perf_counter()
+        try:
+            dense, lexical = await asyncio.gather(
+                self.dense_search(query, candidates),
+                self.lexical_search(query, candidates)
+            )
+            return reciprocal_rank_fusion([dense, lexical], k, rrf_k=settings.hybrid_rrf_k)
+        finally:
+            # Histogram only: the dense and lexical stages are already in the turn's trace
+            RETRIEVAL_DURATION.labels(method="hybrid").observe(time.perf_counter() - started)
+
+    async def dense_search(self, query: str, k: int) -> List[Document]:
+        await self.ready()
+        with timed(RETRIEVAL_DURATION, "retrieval:dense", method="dense"):
+            return await self.vector_store.asimilarity_search(query, k=k)
+
+    async def lexical_search(self, query: str, k: int) -> List[Document]:
+        with timed(RETRIEVAL_DURATION, "retrieval:lexical", method="lexical"):
+            return await asyncio.to_thread(
+                self.lexical_index.search, query, k, settings.hybrid_lexical_min_score
+            )
+
+    async def add_documents(self, documents: List[Document]) -> EmbeddingRunStats:
+        async def stream():
+            for doc in documents:
+                yield doc
+        return await self.add_document_stream(stream())
+
+    async def add_document_stream(
+        self, documents: AsyncIterable[Document], on_commit: Optional[BatchCallback] = None
+    ) -> EmbeddingRunStats:
+        async def with_ids():
+            # Both indexes need the same id for every chunk to stay in sync
+            async for doc in documents:
+                if doc.id is None:
+                    doc.id = content_id(doc.page_content)
+                yield doc
+
+        await self.ready()
+
+        async def committed(batch: List[Document]) -> None:
+            if self.lexical_index:
+                await asyncio.to_thread(self.lexical_index.upsert, batch)
+            if on_commit:
+                await on_commit(batch)
+
+        return await self.embedder.add_stream(with_ids(), on_commit=committed)
+
+    async def delete(self, ids: List[str]) -> None:
+        await self.ready()
+        for start in range(0, len(ids), settings.embedding_batch_size):
+            batch = ids[start:start + settings.embedding_batch_size]
+            await self.vector_store.adelete(ids=batch)
+            if self.lexical_index:
+                await asyncio.to_thread(self.lexical_index.delete, batch)
+
+    async def warm_cache(self, ids: List[str]) -> int:
+        """Copy stored vectors for ``ids`` into the embedding cache so unchanged text is not re-embedded."""
+        if not self.embedding_cache or not ids:
+            return 0
+        await self.ready()
+        warmed = 0
+        for start in range(0, len(ids), 500):
+            result = await asyncio.to_thread(
+                self.vector_store.get, ids=ids[start:start + 500], include=["embeddings", "documents"]
+            )
+            texts = [normalize_text(doc) for doc in result["documents"]]
+            vectors = [list(map(float, vector)) for vector in result["embeddings"]]
+            await asyncio.to_thread(self.embedding_cache.put_many, texts, vectors)
+            warmed += len(texts)
+        return warmed
+
+    async def _backfill_lexical_index(self) -> None:
+        """Index chunks that were stored before the lexical index existed."""
+        await self.ready()
+        total = await asyncio.to_thread(self.vector_store._collection.count)
+        if not total or await asyncio.to_thread(self.lexical_index.count):
+            return
+        logger.info(f"Backfilling lexical index from {total} stored chunks...")
+        for offset in range(0, total, 500):
+            result = await asyncio.to_thread(
+                self.vector_store.get, limit=500, offset=offset, include=["documents", "metadatas"]
+            )
+            batch = [
+                Document(id=doc_id, page_content=text, metadata=metadata or {})
+                for doc_id, text, metadata in zip(
+                    result["ids"], result["documents"], result["metadatas"]
+                )
+            ]
+            await asyncio.to_thread(self.lexical_index.upsert, batch)
+        logger.info("✓ Lexical index backfilled")
+
+
+_vector_service: Optional[VectorService] = None
+
+def set_vector_service(service: Optional[VectorService]) -> None:
+    global _vector_service
+    _vector_service = service
+
+def get_vector_service() -> VectorService:
+    if _vector_service is None:
+        raise VectorStoreError("Vector service is not initialized")
+    return _vector_service
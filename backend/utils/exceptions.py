@@ -20,4 +20,16 @@ class VectorStoreError(ChatbotException):
     pass
 
 class FileProcessingError(ChatbotException):
-    pass
\ No newline at end of file
+    pass
+
+class HttpClientError(ChatbotException):
+    pass
+
+class RunRejectedError(ChatbotException):
+    pass
+
+class RunResumeError(ChatbotException):
+    pass
+
+class CircuitOpenError(ChatbotException):
+    pass
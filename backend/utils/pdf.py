@@ -0,0 +1,29 @@
+"""PDF parsing helpers that run inside ingest worker processes."""
+from typing import List
+from langchain_core.documents import Document
+
+# Module-level functions so they can be pickled into a ProcessPoolExecutor.
+# pypdf and the splitter are imported inside them: only the workers need them.
+
+def count_pdf_pages(file_path: str) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(file_path).pages)
+
+def split_pdf_pages(
+    file_path: str, start: int, stop: int, chunk_size: int, chunk_overlap: int
+) -> List[Document]:
+    """Extract and split pages [start, stop) without touching the rest of the file."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    from pypdf import PdfReader
+    reader = PdfReader(file_path)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+    )
+    splits = []
+    for page_number in range(start, stop):
+        page = Document(
+            page_content=reader.pages[page_number].extract_text() or "",
+            metadata={"source": file_path, "page": page_number}
+        )
+        splits.extend(splitter.split_documents([page]))
+    return splits